@@ -0,0 +1,102 @@
+"""Aggregations over a parsed tracking frame, for the admin analytics tab.
+
+Everything works on the frame from ``parse_tracking_data`` with a sheet
+(typed answer columns) and never touches Streamlit. Each function is a
+handful of vectorized passes over the filtered rows, so a change of filter
+only re-aggregates an in-memory frame.
+"""
+from datetime import date
+
+import pandas as pd
+
+from questionnaire import Question, SheetSchema
+
+CHOICE_TYPES = ("selectbox", "radio", "multiselect")
+NUMBER_TYPES = ("number", "number_float")
+# pandas period aliases offered for submissions over time
+PERIODS = {"Day": "D", "Week": "W", "Month": "M", "Quarter": "Q"}
+
+
+def prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Adds ``submitted``, submitted_at as a UTC timestamp; call once per frame."""
+    df = df.copy()
+    submitted = df["submitted_at"] if "submitted_at" in df.columns else pd.Series(None, index=df.index)
+    df["submitted"] = pd.to_datetime(submitted, errors="coerce", utc=True, format="ISO8601")
+    if "project_id" in df.columns:
+        df["project_id"] = df["project_id"].astype(str)
+    return df
+
+def filter_entries(df: pd.DataFrame, project_ids=(), start: date | None = None, end: date | None = None) -> pd.DataFrame:
+    """Rows of ``project_ids`` (all if empty) submitted between ``start`` and
+    ``end``, both inclusive."""
+    mask = pd.Series(True, index=df.index)
+    if project_ids:
+        mask &= df["project_id"].isin(list(project_ids))
+    if start is not None:
+        mask &= df["submitted"] >= pd.Timestamp(start, tz="UTC")
+    if end is not None:
+        mask &= df["submitted"] < pd.Timestamp(end, tz="UTC") + pd.Timedelta(days=1)
+    return df[mask.to_numpy()]
+
+def answer_distribution(df: pd.DataFrame, q: Question) -> pd.DataFrame:
+    """``answer``, ``entries`` and ``share`` of the entries that answered, in
+    option order (answers outside the options last); options nobody picked
+    count 0. For a multiselect the shares add up to more than 1."""
+    col = df[q.question_id] if q.question_id in df.columns else pd.Series(dtype=object)
+    if q.input_type.lower() == "multiselect":
+        picks = col.explode().dropna()
+        # an entry answered if it picked anything: its index survives the explode
+        answered = picks.index.nunique()
+        counts = picks.value_counts()
+    else:
+        answered = int(col.count())
+        counts = col.value_counts()
+    # counted first, converted after: one str() per distinct answer, not per row
+    counts = counts[counts > 0].groupby(counts.index[counts > 0].astype(str)).sum()
+    order = [*q.options, *(v for v in counts.index if v not in q.options)]
+    counts = counts.reindex(order, fill_value=0)
+    return pd.DataFrame({
+        "answer": counts.index.astype(str),
+        "entries": counts.to_numpy(),
+        "share": counts.to_numpy() / answered if answered else 0.0,
+    })
+
+def answer_distributions(df: pd.DataFrame, sheet: SheetSchema) -> dict:
+    """``{question_id: answer_distribution}`` for every choice question."""
+    return {
+        q.question_id: answer_distribution(df, q)
+        for q in sheet.questions if q.input_type.lower() in CHOICE_TYPES
+    }
+
+def number_summary(df: pd.DataFrame, sheet: SheetSchema) -> pd.DataFrame:
+    """One row per number question: answered count, mean, spread and quartiles."""
+    questions = [q for q in sheet.questions if q.input_type.lower() in NUMBER_TYPES]
+    columns = ["question_id", "question", "answered", "mean", "std", "min", "25%", "median", "75%", "max"]
+    if not questions:
+        return pd.DataFrame(columns=columns)
+    ids = [q.question_id for q in questions]
+    num = df.reindex(columns=ids).apply(pd.to_numeric, errors="coerce").astype("float64")
+    quartiles = num.quantile([0.25, 0.5, 0.75])
+    return pd.DataFrame({
+        "question_id": ids,
+        "question": [q.label for q in questions],
+        "answered": num.count().to_numpy(),
+        "mean": num.mean().to_numpy(),
+        "std": num.std().to_numpy(),
+        "min": num.min().to_numpy(),
+        "25%": quartiles.loc[0.25].to_numpy(),
+        "median": quartiles.loc[0.5].to_numpy(),
+        "75%": quartiles.loc[0.75].to_numpy(),
+        "max": num.max().to_numpy(),
+    }, columns=columns)
+
+def submissions_over_time(df: pd.DataFrame, freq: str = "W") -> pd.DataFrame:
+    """Entries per period (``freq`` is a pandas period alias), indexed by the
+    period start; periods without entries count 0."""
+    submitted = df["submitted"].dropna().dt.tz_convert(None)
+    if submitted.empty:
+        return pd.DataFrame({"entries": []}, index=pd.DatetimeIndex([], name="period"))
+    counts = submitted.dt.to_period(freq).value_counts()
+    periods = pd.period_range(counts.index.min(), counts.index.max(), freq=freq)
+    counts = counts.reindex(periods, fill_value=0)
+    return pd.DataFrame({"entries": counts.to_numpy()}, index=pd.DatetimeIndex(periods.to_timestamp(), name="period"))
@@ -0,0 +1,248 @@
+"""Load test: N concurrent simulated sessions of app_1.py on the local backend.
+
+    python -m benchmarks.load_test --sessions 1,5,10,25
+    python -m benchmarks.load_test --sessions 10 --admins 2 --submissions 3 --json load.json
+
+Each session is a ``streamlit.testing`` AppTest driven from its own thread,
+as the server runs one script thread per browser session, all sharing the
+process's caches. Reporters go through login -> fill the WS form -> save;
+admins through login -> tab3 (sync) -> every export download, over
+``--tracking-rows`` existing entries per workstream. Every script
+run is timed. Per step the latency percentiles are reported, plus
+throughput (runs per second) and resident memory growth per session.
+
+AppTest always reruns the whole script, also for widgets inside
+``st.fragment``, so form steps are measured as full reruns (an upper bound
+of what the browser sees).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = str(ROOT / "app_1.py")
+PASSWORD = "load-test"
+
+_deferred = {}
+_deferred_lock = threading.Lock()
+
+
+def _track_deferred_downloads():
+    # AppTest gives every run its own media file manager; remember which one
+    # holds each deferred download so a thread can fetch its own file
+    from streamlit.runtime.media_file_manager import MediaFileManager
+
+    add_deferred = MediaFileManager.add_deferred
+
+    def add(self, *args, **kwargs):
+        file_id = add_deferred(self, *args, **kwargs)
+        with _deferred_lock:
+            _deferred[file_id] = self
+        return file_id
+
+    MediaFileManager.add_deferred = add
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = []
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def timed(self, step: str, fn):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.samples.append((step, elapsed))
+        exceptions = [e.value for e in getattr(result, "exception", [])]
+        if exceptions:
+            with self._lock:
+                self.errors.append(f"{step}: {exceptions[0]}")
+        return result
+
+
+def _login(rec: Recorder, email: str):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=300)
+    rec.timed("open", at.run)
+    at.text_input[0].set_value(email)
+    at.text_input[1].set_value(PASSWORD)
+    at.button[0].click()
+    rec.timed("login", at.run)
+    return at
+
+def reporter(rec: Recorder, email: str, submissions: int):
+    at = _login(rec, email)
+    for _ in range(submissions):
+        for w in at.text_area:
+            w.set_value("Load test answer")
+        rec.timed("form_fill", at.run)
+        # answering may reveal more required text fields
+        for w in at.text_area:
+            if not w.value:
+                w.set_value("Load test answer")
+        rec.timed("form_fill", at.run)
+        next(b for b in at.button if b.label.startswith("Save")).click()
+        rec.timed("submit", at.run)
+    return at
+
+def admin(rec: Recorder, email: str, exports: bool):
+    at = _login(rec, email)
+    rec.timed("admin_tab3", at.run)
+    if exports:
+        for button in at.get("download_button"):
+            file_id = button.proto.deferred_file_id
+            with _deferred_lock:
+                mgr = _deferred.get(file_id)
+            if mgr is not None:
+                key = button.proto.id.rsplit("-", 1)[-1]
+                rec.timed(f"export:{key}", lambda: mgr.execute_deferred(file_id))
+    return at
+
+# =========================
+# Setup and reporting
+# =========================
+def setup_backend(path: Path, reporters: int, admins: int, projects: int, tracking_rows: int):
+    from benchmarks.synthetic import synthetic_rows
+    from local_backend import LocalBackend
+    from questionnaire import QuestionnaireRegistry
+
+    backend = LocalBackend(path, seed=False)
+    # existing history, so tab3 has something to sync and export
+    registry = QuestionnaireRegistry(ROOT / "tracking_questions.xlsx")
+    for n in range(1, 6):
+        backend.insert_rows(f"Tracking_WS{n}", synthetic_rows(registry.sheet(f"WS{n}"), tracking_rows, workstream=f"WS{n}", seed=n))
+    users = []
+    for i in range(reporters):
+        email = f"reporter{i}@example.org"
+        uid = backend.add_user(email, PASSWORD)
+        backend.insert_rows("Projekt_Data", [
+            {"Projektakronym": f"LT{i}-{k}", "Titel": f"Load test project {k}", "Workstream": 1 + (i + k) % 5, "owner_id": uid}
+            for k in range(projects)
+        ])
+        users.append(("reporter", email))
+    for i in range(admins):
+        email = f"admin{i}@example.org"
+        backend.add_user(email, PASSWORD, {"role": "admin"})
+        users.append(("admin", email))
+    return users
+
+def summarize(rec: Recorder, sessions: int, wall: float, rss_before: float, rss_after: float) -> dict:
+    steps = {}
+    for step, seconds in rec.samples:
+        steps.setdefault(step, []).append(seconds)
+    return {
+        "sessions": sessions,
+        "runs": len(rec.samples),
+        "wall_s": wall,
+        "runs_per_s": len(rec.samples) / wall if wall else 0.0,
+        "rss_mb_per_session": (rss_after - rss_before) / sessions,
+        "errors": rec.errors,
+        "steps": {
+            step: {
+                "count": len(v),
+                **{f"p{p}_ms": float(np.percentile(v, p)) * 1000 for p in (50, 90, 99)},
+                "max_ms": max(v) * 1000,
+            }
+            for step, v in sorted(steps.items())
+        },
+    }
+
+def print_summary(s: dict):
+    print(f"\n== {s['sessions']} sessions: {s['runs']} runs in {s['wall_s']:.1f}s "
+          f"= {s['runs_per_s']:.1f} runs/s, {s['rss_mb_per_session']:.1f} MB RSS per session")
+    print(f"{'step':<30}{'n':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step, v in s["steps"].items():
+        print(f"{step:<30}{v['count']:>6}{v['p50_ms']:>10.0f}{v['p90_ms']:>10.0f}{v['p99_ms']:>10.0f}{v['max_ms']:>10.0f}")
+    for e in s["errors"][:5]:
+        print(f"! {e}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="1,5,10", help="concurrent sessions per round")
+    parser.add_argument("--admins", type=int, default=1, help="admin sessions in each round")
+    parser.add_argument("--submissions", type=int, default=2, help="form saves per reporter")
+    parser.add_argument("--projects", type=int, default=3, help="projects per reporter")
+    parser.add_argument("--tracking-rows", type=int, default=2000, help="existing entries per workstream")
+    parser.add_argument("--no-exports", action="store_true", help="admins skip the export downloads")
+    parser.add_argument("--json", type=Path, help="write the summaries as JSON")
+    args = parser.parse_args(argv)
+    rounds = [int(n) for n in args.sessions.split(",") if n.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "DATA_BACKEND": "local",
+            "LOCAL_BACKEND_PATH": str(Path(tmp) / "backend.sqlite3"),
+            "TRACKING_CACHE_PATH": str(Path(tmp) / "tracking.sqlite3"),
+            "OUTBOX_PATH": str(Path(tmp) / "outbox.sqlite3"),
+            "SHARED_CACHE_PATH": str(Path(tmp) / "shared.sqlite3"),
+            "SCHEMA_SIDECAR_PATH": "",
+        })
+        sys.path.insert(0, str(ROOT))
+        _track_deferred_downloads()
+        admins = min(args.admins, max(rounds))
+        users = setup_backend(Path(tmp) / "backend.sqlite3", max(rounds) - admins, admins, args.projects, args.tracking_rows)
+        admin_users = [u for u in users if u[0] == "admin"]
+        reporter_users = [u for u in users if u[0] == "reporter"]
+
+        # one warm-up session, so imports and the questionnaire compile are not
+        # counted against the first round
+        if admin_users:
+            admin(Recorder(), admin_users[0][1], exports=False)
+        else:
+            reporter(Recorder(), reporter_users[0][1], 0)
+
+        summaries = []
+        for n in rounds:
+            n_admins = min(admins, n)
+            chosen = admin_users[:n_admins] + reporter_users[:n - n_admins]
+            rec = Recorder()
+            kept = []
+            rss_before = rss_mb()
+
+            def session(kind, email):
+                try:
+                    if kind == "admin":
+                        kept.append(admin(rec, email, not args.no_exports))
+                    else:
+                        kept.append(reporter(rec, email, args.submissions))
+                except Exception as e:
+                    rec.errors.append(f"{email}: {e!r}")
+
+            threads = [threading.Thread(target=session, args=u) for u in chosen]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            wall = time.perf_counter() - start
+            # sessions are still referenced (kept) while memory is read
+            summary = summarize(rec, n, wall, rss_before, rss_mb())
+            del kept
+            print_summary(summary)
+            summaries.append(summary)
+
+    if args.json:
+        args.json.write_text(json.dumps(summaries, indent=2), encoding="utf-8")
+    return 1 if any(s["errors"] for s in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
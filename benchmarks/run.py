@@ -0,0 +1,221 @@
+"""Benchmarks for the form, parsing, download and export hot paths.
+
+    python -m benchmarks.run                          # default sizes
+    python -m benchmarks.run --rows 1000,1000000      # extreme table sizes
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json  # exit 1 on regressions
+
+Each stage is timed ``--repeat`` times without tracing (best run is kept),
+then run once more under tracemalloc for the peak traced memory. Retained
+blocks is the growth of the interpreter's live allocations while the
+stage's result is still held, a rough allocation count.
+"""
+import argparse
+import gc
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_rows, synthetic_sheet, widget_values
+from exports import ExportSource, export_columns, parquet_available, write_csv, write_excel, write_parquet
+from questionnaire import QuestionnaireSchema, resolve_form
+from tracking_cache import TrackingCache
+from tracking_data import PAGE_SIZE, parse_tracking_data
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FORM_STAGES = ("compile_sheet", "resolve_form", "render_form")
+ROW_STAGES = ("parse", "download", "export_xlsx", "export_csv", "export_parquet")
+
+
+def measure(fn, repeat: int) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    retained = sys.getallocatedblocks() - blocks
+    del result
+    return {"wall_s": best, "peak_mb": peak / 2**20, "retained_blocks": retained}
+
+# =========================
+# Form stages
+# =========================
+def _render_app(schema_path: str, root: str):
+    import json, sys
+    sys.path.insert(0, root)
+    import streamlit as st
+    from forms import render_form
+    from questionnaire import QuestionnaireSchema
+
+    @st.cache_resource
+    def sheet(path):
+        with open(path, encoding="utf-8") as f:
+            return QuestionnaireSchema.from_dict(json.load(f)).sheet("BENCH")
+
+    render_form(sheet(schema_path), "bench")
+
+def form_stage(stage: str, n_questions: int, workdir: Path):
+    sheet = synthetic_sheet(n_questions)
+    if stage == "compile_sheet":
+        return lambda: synthetic_sheet(n_questions)
+    if stage == "resolve_form":
+        values = widget_values(sheet)
+        return lambda: resolve_form(sheet, lambda q: values[q.question_id])
+    if stage == "render_form":
+        from streamlit.testing.v1 import AppTest
+
+        path = workdir / f"sheet_{n_questions}.json"
+        path.write_text(json.dumps(QuestionnaireSchema("bench", "", {"BENCH": sheet}).to_dict()), encoding="utf-8")
+        at = AppTest.from_function(_render_app, args=(str(path), str(ROOT)), default_timeout=600)
+        at.run()  # cold run: imports and widget registration
+        # a rerun, as after every widget interaction
+        return lambda: at.run()
+    raise ValueError(stage)
+
+# =========================
+# Row stages
+# =========================
+def _chunks(rows: list, sheet) -> list:
+    return [parse_tracking_data(rows[i:i + PAGE_SIZE], "WS1", sheet) for i in range(0, len(rows), PAGE_SIZE)]
+
+def row_stage(stage: str, rows: list, sheet, workdir: Path):
+    if stage == "parse":
+        return lambda: parse_tracking_data(rows, "WS1", sheet)
+    if stage == "download":
+        from local_backend import LocalBackend
+
+        backend = LocalBackend(workdir / f"backend_{len(rows)}.sqlite3", seed=False)
+        backend.add_user("bench@example.org", "bench", {"role": "admin"})
+        backend.insert_rows("Tracking_WS1", rows)
+        client = backend.client()
+        client.postgrest.auth(backend.sign_in("bench@example.org", "bench").session.access_token)
+        cache = TrackingCache(workdir / f"cache_{len(rows)}.sqlite3")
+
+        # what the admin tab does on a cold cache: sync the whole table, parse, concat
+        def download():
+            cache.full_resync(client, 1)
+            return pd.concat(list(cache.iter_frames(1, sheet=sheet)), ignore_index=True)
+        return download
+
+    chunks = _chunks(rows, sheet)
+    keys = dict.fromkeys(k for c in chunks for k in c.columns)
+    source = ExportSource(export_columns(keys, sheet), lambda: iter(chunks), sheet)
+    if stage == "export_xlsx":
+        return lambda: write_excel({"WS1": source}, io.BytesIO())
+    if stage == "export_csv":
+        return lambda: write_csv(source, io.BytesIO())
+    if stage == "export_parquet":
+        return lambda: write_parquet(source, io.BytesIO())
+    raise ValueError(stage)
+
+# =========================
+# Reporting
+# =========================
+def _sizes(text: str) -> list:
+    return [int(float(s)) for s in text.split(",") if s.strip()]
+
+# differences below these are noise, whatever the percentage
+NOISE_FLOOR = {"wall_s": 0.005, "peak_mb": 1.0}
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    base = {(r["stage"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        b = base.get((r["stage"], r["size"]))
+        if b is None:
+            continue
+        for metric in ("wall_s", "peak_mb"):
+            change = (r[metric] - b[metric]) / b[metric] if b[metric] else 0.0
+            r[f"{metric}_change"] = change
+            if change > threshold and r[metric] - b[metric] > NOISE_FLOOR[metric]:
+                regressions.append(f"{r['stage']} @ {r['size']}: {metric} {b[metric]:.4g} -> {r[metric]:.4g} (+{change:.0%})")
+    return regressions
+
+def _header() -> str:
+    return f"{'stage':<16}{'size':>10}{'wall s':>12}{'Δ':>8}{'peak MB':>11}{'Δ':>8}{'retained':>11}"
+
+def _line(r: dict) -> str:
+    dw = f"{r['wall_s_change']:+.0%}" if "wall_s_change" in r else ""
+    dm = f"{r['peak_mb_change']:+.0%}" if "peak_mb_change" in r else ""
+    return f"{r['stage']:<16}{r['size']:>10}{r['wall_s']:>12.4f}{dw:>8}{r['peak_mb']:>11.1f}{dm:>8}{r['retained_blocks']:>11}"
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", default=",".join(FORM_STAGES + ROW_STAGES))
+    parser.add_argument("--questions", default="50,200,1000", help="questionnaire sizes for the form stages")
+    parser.add_argument("--rows", default="1000,10000,100000", help="table sizes for the row stages")
+    parser.add_argument("--row-questions", type=int, default=60, help="questions per row (answers width)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", type=Path, help="write results as JSON (a baseline)")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown/growth before failing")
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    if "export_parquet" in stages and not parquet_available():
+        print("pyarrow not installed: skipping export_parquet")
+        stages.remove("export_parquet")
+    unknown = set(stages) - set(FORM_STAGES + ROW_STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    results = []
+    print(_header())
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for n in _sizes(args.questions):
+            for stage in (s for s in stages if s in FORM_STAGES):
+                results.append({"stage": stage, "size": n, **measure(form_stage(stage, n, workdir), args.repeat)})
+                print(_line(results[-1]), flush=True)
+        sheet = synthetic_sheet(args.row_questions, seed=1)
+        for n in _sizes(args.rows):
+            rows = synthetic_rows(sheet, n)
+            # big tables are slow enough that one timed run is representative
+            repeat = args.repeat if n <= 10_000 else 1
+            for stage in (s for s in stages if s in ROW_STAGES):
+                results.append({"stage": stage, "size": n, **measure(row_stage(stage, rows, sheet, workdir), repeat)})
+                print(_line(results[-1]), flush=True)
+            del rows
+
+    regressions = []
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text(encoding="utf-8")), args.threshold)
+    if args.compare:
+        print("\nCompared with " + str(args.compare))
+        print(_header())
+        print("\n".join(_line(r) for r in results))
+    if args.save:
+        meta = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.platform(),
+            "row_questions": args.row_questions,
+        }
+        args.save.write_text(json.dumps({"meta": meta, "results": results}, indent=2), encoding="utf-8")
+    if regressions:
+        print("\nRegressions:\n" + "\n".join(f"- {r}" for r in regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
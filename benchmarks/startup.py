@@ -0,0 +1,127 @@
+"""Cold-start timings of app_1.py, each sample in a fresh interpreter.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --repeat 5 --think 0 --json startup.json
+
+Per sample a new Python process (as a freshly started server worker) opens
+the app on the local backend and records:
+
+- ``import_streamlit``: importing Streamlit itself, the floor of any page
+- ``login_page``: the first script run, up to the drawn sign-in form
+- ``sign_in``: submitting the form, ``--think`` seconds later (the time a
+  visitor spends typing, in which background warm-up can run)
+- ``first_page``: the rerun after sign-in that draws the project tabs
+- ``rerun``: a warm rerun of the same page
+
+It also lists the heavy modules the login page's script run imported
+itself (the background warm-up thread aside), which should be none.
+"""
+import argparse
+import builtins
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = str(ROOT / "app_1.py")
+HEAVY_MODULES = ("pandas", "numpy", "supabase", "httpx", "openpyxl", "pyarrow")
+STEPS = ("import_streamlit", "login_page", "sign_in", "first_page", "rerun")
+
+
+def _record_imports(seen: set):
+    # heavy modules first imported outside the warm-up thread
+    real_import = builtins.__import__
+
+    def record(name, *args, **kwargs):
+        top = name.partition(".")[0]
+        if top in HEAVY_MODULES and top not in sys.modules and threading.current_thread().name != "warm-up":
+            seen.add(top)
+        return real_import(name, *args, **kwargs)
+
+    builtins.__import__ = record
+    return real_import
+
+def child(think: float) -> dict:
+    """One sample; runs in the fresh process."""
+    timings = {}
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    timings["import_streamlit"] = time.perf_counter() - start
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    seen = set()
+    real_import = _record_imports(seen)
+    start = time.perf_counter()
+    at.run()
+    timings["login_page"] = time.perf_counter() - start
+    builtins.__import__ = real_import
+    # numpy comes with st.image itself
+    loaded = sorted(seen)
+
+    time.sleep(think)
+    at.text_input[0].set_value("admin@example.org")
+    at.text_input[1].set_value("admin")
+    at.button[0].click()
+    for step in ("sign_in", "first_page", "rerun"):
+        start = time.perf_counter()
+        at.run()
+        timings[step] = time.perf_counter() - start
+    errors = [str(e.value) for e in at.exception]
+    return {"timings": timings, "loaded_at_login_page": loaded, "errors": errors}
+
+def sample(env: dict, think: float) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", "--think", str(think)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes to sample")
+    parser.add_argument("--think", type=float, default=2.0, help="seconds between the login page and signing in")
+    parser.add_argument("--json", type=Path, help="write the samples as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(child(args.think)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATA_BACKEND": "local",
+            "LOCAL_BACKEND_PATH": str(Path(tmp) / "backend.sqlite3"),
+            "TRACKING_CACHE_PATH": str(Path(tmp) / "tracking.sqlite3"),
+            "OUTBOX_PATH": str(Path(tmp) / "outbox.sqlite3"),
+            "SHARED_CACHE_PATH": str(Path(tmp) / "shared.sqlite3"),
+        }
+        # the demo users are seeded here, not in the timed sign-in
+        sys.path.insert(0, str(ROOT))
+        from local_backend import LocalBackend
+        LocalBackend(Path(tmp) / "backend.sqlite3")
+        samples = [sample(env, args.think) for _ in range(args.repeat)]
+
+    print(f"{'step':<20}{'median s':>10}{'min s':>10}{'max s':>10}")
+    for step in STEPS:
+        values = [s["timings"][step] for s in samples]
+        print(f"{step:<20}{statistics.median(values):>10.3f}{min(values):>10.3f}{max(values):>10.3f}")
+    loaded = sorted({m for s in samples for m in s["loaded_at_login_page"]})
+    print(f"\nImported by the login page: {', '.join(loaded) or 'nothing heavy'}")
+    errors = [e for s in samples for e in s["errors"]]
+    for e in errors[:5]:
+        print(f"! {e}")
+    if args.json:
+        args.json.write_text(json.dumps(samples, indent=2), encoding="utf-8")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
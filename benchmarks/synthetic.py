@@ -0,0 +1,121 @@
+"""Synthetic questionnaires and tracking rows for the benchmarks.
+
+Everything is generated from a seed, so two runs measure the same input.
+"""
+import json
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from questionnaire import QUESTION_COLUMNS, SheetSchema, _compile_sheet
+
+INPUT_TYPES = ("radio", "selectbox", "multiselect", "text_input", "text_area", "checkbox", "number", "number_float", "date")
+CHOICE_TYPES = ("radio", "selectbox", "checkbox")
+
+
+def synthetic_sheet(n_questions: int, chain_share: float = 0.6, required_if_share: float = 0.3, seed: int = 0) -> SheetSchema:
+    """A sheet with ``n_questions`` questions.
+
+    About ``chain_share`` of the questions depend on the question right
+    before them, so the conditions form long chains (depth grows with the
+    sheet); about ``required_if_share`` get a required_if rule.
+    """
+    rng = random.Random(seed)
+    rows = []
+    choice_qs = []
+    for i in range(n_questions):
+        itype = rng.choice(INPUT_TYPES) if i % 3 else rng.choice(CHOICE_TYPES)
+        options = [f"Option {k}" for k in range(rng.randint(2, 6))] if itype in ("radio", "selectbox", "multiselect") else []
+        row = {c: "" for c in QUESTION_COLUMNS}
+        row.update({
+            "question_id": f"q{i}",
+            "section": f"Section {i // 25}",
+            "label": f"Question {i}",
+            "input_type": itype,
+            "options": "|".join(options),
+            "required": "TRUE" if rng.random() < 0.5 else "FALSE",
+        })
+        if itype == "number":
+            row.update(min_value="0", max_value="1000", step="1")
+        if choice_qs and rng.random() < chain_share:
+            # the latest choice question, so conditions chain one after another
+            parent = choice_qs[-1] if rng.random() < 0.8 else rng.choice(choice_qs)
+            row.update(condition_field=parent[0], condition_value=parent[1])
+        if choice_qs and rng.random() < required_if_share:
+            parent = rng.choice(choice_qs)
+            row.update(required="FALSE", required_if_field=parent[0], required_if_value=parent[1])
+        if itype in CHOICE_TYPES:
+            choice_qs.append((f"q{i}", "True" if itype == "checkbox" else options[0]))
+        rows.append(row)
+    return _compile_sheet("BENCH", pd.DataFrame(rows, columns=QUESTION_COLUMNS), {})
+
+def answer_pools(sheet: SheetSchema, rng: random.Random) -> dict:
+    """A few possible stored answers per question (payload form)."""
+    pools = {}
+    for q in sheet.questions:
+        itype = q.input_type.lower()
+        if itype in ("radio", "selectbox"):
+            # weighted towards the first option, which keeps chains visible
+            pools[q.question_id] = [q.options[0]] * 3 + list(q.options)
+        elif itype == "multiselect":
+            pools[q.question_id] = [", ".join(rng.sample(q.options, rng.randint(1, len(q.options)))) for _ in range(4)]
+        elif itype == "checkbox":
+            pools[q.question_id] = [True, True, False]
+        elif itype == "number":
+            pools[q.question_id] = [rng.randint(0, 1000) for _ in range(8)]
+        elif itype == "number_float":
+            pools[q.question_id] = [round(rng.uniform(0, 100), 2) for _ in range(8)]
+        elif itype == "date":
+            pools[q.question_id] = [f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(8)]
+        else:
+            pools[q.question_id] = [" ".join(rng.choice(("carbon", "capture", "storage", "pilot", "plant")) for _ in range(rng.randint(3, 40))) for _ in range(8)]
+    return pools
+
+def synthetic_answers(sheet: SheetSchema, rng: random.Random, pools: dict) -> dict:
+    """One entry as the form would store it: hidden questions are absent."""
+    answers = {}
+    for i in sheet.order:
+        q = sheet.questions[i]
+        if q.condition_field and str(answers.get(q.condition_field, "")) != q.condition_value:
+            continue
+        answers[q.question_id] = rng.choice(pools[q.question_id])
+    return answers
+
+def synthetic_rows(sheet: SheetSchema, n_rows: int, n_projects: int = 200, workstream: str = "WS1", seed: int = 0) -> list:
+    """Raw Tracking_WS rows as PostgREST returns them (answers as JSON text)."""
+    rng = random.Random(seed)
+    pools = answer_pools(sheet, rng)
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "id": i + 1,
+            "project_id": str(rng.randrange(n_projects)),
+            "submitted_at": (start + timedelta(minutes=i)).isoformat(),
+            "user_id": f"user-{rng.randrange(50)}",
+            "Form_title": "Benchmark",
+            "Workstream": workstream,
+            "answers": json.dumps(synthetic_answers(sheet, rng, pools)),
+        }
+        for i in range(n_rows)
+    ]
+
+def widget_values(sheet: SheetSchema, seed: int = 0) -> dict:
+    """Answers in widget form (lists, dates, ...) for resolve_form."""
+    rng = random.Random(seed)
+    values = {}
+    for q in sheet.questions:
+        itype = q.input_type.lower()
+        if itype in ("radio", "selectbox"):
+            values[q.question_id] = q.options[0]
+        elif itype == "multiselect":
+            values[q.question_id] = list(q.options[:2])
+        elif itype == "checkbox":
+            values[q.question_id] = True
+        elif itype in ("number", "number_float"):
+            values[q.question_id] = rng.randint(0, 100)
+        elif itype == "date":
+            values[q.question_id] = datetime(2025, 1, 1).date()
+        else:
+            values[q.question_id] = "some text"
+    return values
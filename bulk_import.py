@@ -0,0 +1,270 @@
+"""Bulk import of historical tracking entries from Excel or CSV.
+
+One row per entry: ``project_id``, optionally ``submitted_at`` and
+``Form_title``, and one column per question (headed by question_id or by
+the question's label). Rows are checked with the same visibility and
+required rules as the form (``questionnaire.resolve_form``), but column by
+column over the whole file: one pass over ``SheetSchema.order`` with pandas
+operations per question, not per row.
+"""
+import io
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+
+import pandas as pd
+from openpyxl import Workbook
+from postgrest.types import ReturnMethod
+
+from questionnaire import FALSE_WORDS, QUESTION_COLUMNS, TRUE_WORDS, Question, SheetSchema, split_multiselect
+
+META_COLUMNS = ("project_id", "submitted_at", "Form_title")
+IMPORT_CHUNK_SIZE = 500
+# submission_ids of imported rows are derived from file and row, so
+# importing the same file twice inserts nothing the second time
+IMPORT_NAMESPACE = uuid.UUID("6f1c7a52-3b0e-4f7e-9a43-2d8e5c1b9f10")
+
+
+@dataclass
+class ImportResult:
+    rows: list
+    errors: pd.DataFrame
+    ignored_columns: list
+    total: int
+
+    @property
+    def invalid(self) -> int:
+        return self.errors["row"].nunique() if not self.errors.empty else 0
+
+
+def read_import_file(data: bytes, name: str) -> pd.DataFrame:
+    """The file's entries; the index is kept as in the file (data row ``i`` is
+    spreadsheet row ``i + 2``), so errors name the rows the user sees."""
+    if name.lower().endswith(".csv"):
+        df = pd.read_csv(
+            io.BytesIO(data), dtype=str, keep_default_na=False, skip_blank_lines=False,
+            encoding="utf-8-sig", sep=None, engine="python",
+        )
+    else:
+        df = pd.read_excel(io.BytesIO(data), dtype=object)
+    df.columns = [str(c).strip() for c in df.columns]
+    blank = pd.DataFrame({c: _blank(df[c]) for c in df.columns}, index=df.index)
+    return df[~blank.all(axis=1)]
+
+def import_template(sheet: SheetSchema) -> bytes:
+    """Workbook with the expected header and the questions for reference."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Entries")
+    ws.append([*META_COLUMNS, *(q.question_id for q in _answer_questions(sheet))])
+    ref = wb.create_sheet("Questions")
+    ref.append(QUESTION_COLUMNS)
+    for rec in sheet.to_frame().itertuples(index=False, name=None):
+        ref.append(list(rec))
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+def _answer_questions(sheet: SheetSchema) -> list:
+    return [q for q in sheet.questions if q.question_id and q.input_type.lower() != "header"]
+
+# =========================
+# Column conversion
+# =========================
+def _blank(col: pd.Series) -> pd.Series:
+    return col.isna() | col.astype(str).str.strip().eq("")
+
+def _objects(col: pd.Series) -> pd.Series:
+    # plain Python objects with None for missing, as the form would send
+    return col.astype(object).where(col.notna(), None)
+
+def _bound(text: str):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def _convert(q: Question, col: pd.Series):
+    """``(values, text, invalid, message)`` for one answer column.
+
+    ``values`` are what the form would send, ``text`` is ``str()`` of what
+    the form's widget would return (what conditions compare against) and
+    ``invalid`` marks non-blank cells the widget could never produce.
+    """
+    itype = q.input_type.lower()
+    blank = _blank(col)
+    none = pd.Series(None, index=col.index, dtype=object)
+    invalid = pd.Series(False, index=col.index)
+    message = ""
+
+    if itype in ("number", "number_float"):
+        num = pd.to_numeric(col.where(~blank), errors="coerce")
+        invalid = ~blank & num.isna()
+        message = "not a number"
+        if itype == "number":
+            invalid |= num.notna() & (num % 1 != 0)
+            message = "not a whole number"
+        lo, hi = _bound(q.min_value), _bound(q.max_value)
+        if lo is not None or hi is not None:
+            out = (num < lo if lo is not None else False) | (num > hi if hi is not None else False)
+            invalid |= out
+            message += f" or outside {q.min_value or '…'}–{q.max_value or '…'}"
+        ok = num.notna() & ~invalid
+        if itype == "number":
+            num = num.where(ok, 0).astype("int64")
+        values = num.astype(object).where(ok, None)
+        return values, values.map(lambda v: "" if v is None else str(v)), invalid, message
+
+    if itype == "date":
+        dates = pd.to_datetime(col.where(~blank), errors="coerce", format="ISO8601")
+        retry = ~blank & dates.isna()
+        if retry.any():
+            dates[retry] = pd.to_datetime(col[retry], errors="coerce", format="mixed", dayfirst=True)
+        invalid = ~blank & dates.isna()
+        values = _objects(dates.map(lambda d: None if pd.isna(d) else d.date().isoformat()))
+        return values, values.fillna(""), invalid, "not a date"
+
+    if itype == "checkbox":
+        words = col.astype(str).str.strip().str.lower()
+        checked = words.isin(TRUE_WORDS) | col.map(lambda v: v is True)
+        unchecked = blank | words.isin(FALSE_WORDS) | col.map(lambda v: v is False)
+        # an untouched checkbox is False in the form
+        values = checked.astype(object)
+        return values, values.map(str), ~checked & ~unchecked, "not yes/no"
+
+    text = col.astype(str).str.strip().astype(object).where(~blank, None)
+    if itype == "multiselect":
+        lists = text.map(lambda v: split_multiselect(v, q.options) if isinstance(v, str) else [])
+        known = set(q.options)
+        invalid = lists.map(lambda v: any(o not in known for o in v))
+        values = _objects(lists.map(lambda v: ", ".join(v) if v else None))
+        return values, lists.map(str), invalid, "choice not among the options"
+
+    values = text
+    if itype in ("selectbox", "radio"):
+        invalid = ~blank & ~text.isin(q.options)
+        message = "not one of the options"
+    elif itype not in ("text_input", "text_area"):
+        # the form renders nothing for unknown input types
+        return none, pd.Series("None", index=col.index), invalid, message
+    return values, values.fillna(""), invalid, message
+
+# =========================
+# Validation
+# =========================
+def _error_frame(mask: pd.Series, question_id: str, message: str) -> pd.DataFrame:
+    rows = mask.index[mask.to_numpy()].to_numpy()
+    # row numbers as in the spreadsheet (header is row 1)
+    return pd.DataFrame({"row": rows + 2, "question_id": question_id, "message": message})
+
+def validate_import(
+    df: pd.DataFrame,
+    sheet: SheetSchema,
+    workstream: str,
+    form_title: str = "",
+    known_projects=None,
+    source_digest: str = "",
+) -> ImportResult:
+    """Check every row and build insert-ready rows for the valid ones.
+
+    Errors give ``df``'s index + 2 as the row, the spreadsheet row for a
+    frame from ``read_import_file``.
+    """
+    labels = Counter(q.label for q in _answer_questions(sheet))
+    # a label shared by several questions can't name a column
+    by_label = {q.label: q.question_id for q in _answer_questions(sheet) if q.label and labels[q.label] == 1}
+    qids = {q.question_id for q in sheet.questions if q.question_id}
+    rename = {c: by_label[c] for c in df.columns if c not in qids and c in by_label and by_label[c] not in df.columns}
+    df = df.rename(columns=rename)
+    ignored = [c for c in df.columns if c not in qids and c not in META_COLUMNS]
+    n = len(df)
+    empty_col = pd.Series(None, index=df.index, dtype=object)
+    errors = []
+
+    project = df["project_id"] if "project_id" in df.columns else empty_col
+    project_blank = _blank(project)
+    project = project.where(project_blank, project.astype(str).str.strip())
+    errors.append(_error_frame(project_blank, "project_id", "missing project_id"))
+    if known_projects is not None:
+        unknown = ~project_blank & ~project.isin({str(p) for p in known_projects})
+        errors.append(_error_frame(unknown, "project_id", "unknown project"))
+
+    submitted = df["submitted_at"] if "submitted_at" in df.columns else empty_col
+    submitted_blank = _blank(submitted)
+    stamps = pd.to_datetime(submitted.where(~submitted_blank), errors="coerce", format="mixed")
+    errors.append(_error_frame(~submitted_blank & stamps.isna(), "submitted_at", "not a date/time"))
+    now = pd.Timestamp.now().isoformat()
+    submitted_at = stamps.map(lambda t: now if pd.isna(t) else t.isoformat())
+
+    titles = df["Form_title"] if "Form_title" in df.columns else empty_col
+    titles = titles.where(~_blank(titles), form_title).astype(str)
+
+    # One pass in dependency order, as resolve_form does per row. text[qid]
+    # is "" where the question is hidden: the form never adds hidden
+    # questions to its answers, so conditions on them compare against "".
+    text, visible, values, empty = {}, {}, {}, {}
+    all_rows = pd.Series(True, index=df.index)
+    for i in sheet.order:
+        q = sheet.questions[i]
+        if not q.question_id:
+            continue
+        col = df[q.question_id] if q.question_id in df.columns else empty_col
+        vals, txt, invalid, message = _convert(q, col)
+        # parents come earlier in sheet.order, so their text is known
+        vis = text[q.condition_field].eq(q.condition_value) if q.condition_field else all_rows
+        errors.append(_error_frame(vis & invalid, q.question_id, f"{q.label}: {message}"))
+        visible[q.question_id] = vis
+        values[q.question_id] = vals.where(~invalid, None)
+        empty[q.question_id] = vis & ~invalid & vals.isna()
+        text[q.question_id] = txt.where(vis, "")
+
+    # required_if may point at a later question (or none in the sheet), so
+    # it is checked once all text is known, as resolve_form does
+    for q in sheet.questions:
+        if not q.question_id or not (q.required or q.required_if_field):
+            continue
+        if q.required:
+            required = all_rows
+        elif q.required_if_field in text:
+            required = text[q.required_if_field].eq(q.required_if_value)
+        else:
+            required = pd.Series(q.required_if_value == "", index=df.index)
+        errors.append(_error_frame(empty[q.question_id] & required, q.question_id, f"{q.label}: required"))
+
+    errors = pd.concat(errors, ignore_index=True).sort_values("row", kind="stable").reset_index(drop=True)
+    bad = set(errors["row"] - 2)
+
+    answers = pd.DataFrame(values, index=df.index)
+    shown = pd.DataFrame(visible, index=df.index)
+    order = list(answers.columns)
+    rows = []
+    for r, (label, vals, vis) in enumerate(zip(df.index, answers.itertuples(index=False, name=None), shown.itertuples(index=False, name=None))):
+        if label in bad:
+            continue
+        rows.append({
+            "project_id": project.iat[r],
+            "Workstream": workstream,
+            "submitted_at": submitted_at.iat[r],
+            "Form_title": titles.iat[r],
+            "answers": {qid: v for qid, v, s in zip(order, vals, vis) if s},
+            "submission_id": str(uuid.uuid5(IMPORT_NAMESPACE, f"{source_digest}:{workstream}:{r}")),
+        })
+    return ImportResult(rows=rows, errors=errors, ignored_columns=ignored, total=n)
+
+# =========================
+# Insert
+# =========================
+def insert_rows(client, table_name: str, rows: list, chunk_size: int = IMPORT_CHUNK_SIZE, on_chunk=None) -> int:
+    """Insert in chunks of ``chunk_size``; rows whose submission_id already
+    exists are skipped. ``on_chunk(done, total)`` is called after each chunk."""
+    done = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        (
+            client.table(table_name)
+            .upsert(chunk, on_conflict="submission_id", ignore_duplicates=True, returning=ReturnMethod.minimal)
+            .execute()
+        )
+        done += len(chunk)
+        if on_chunk:
+            on_chunk(done, len(rows))
+    return done
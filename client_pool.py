@@ -0,0 +1,102 @@
+"""Per-session Supabase clients sharing one keep-alive HTTP connection pool.
+
+Every Streamlit session gets its own lightweight ``Client`` so one user's
+token can never end up on another user's request. The underlying
+``httpx.Client`` is shared, so TCP/TLS connections are reused across
+sessions. The pool is bounded (LRU) and drops clients that have been idle
+for ``idle_ttl`` seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+import httpx
+from supabase import Client, ClientOptions, create_client
+
+
+class ClientPool:
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_clients: int = 256,
+        idle_ttl: float = 1800,
+        max_connections: int = 100,
+        timeout: float = 30,
+        factory: Callable[[], Client] | None = None,
+    ):
+        self.url = url
+        self.key = key
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self._http = httpx.Client(
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self._clients: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        # makes clients for another backend (see local_backend.py)
+        self._factory = factory
+
+    def create(self) -> Client:
+        """A new client on the shared connection pool, not tracked by the pool."""
+        if self._factory is not None:
+            return self._factory()
+        options = ClientOptions(
+            httpx_client=self._http,
+            # tokens are refreshed by the app (see hydrate_token_from_session),
+            # not by a timer thread per client
+            auto_refresh_token=False,
+        )
+        return create_client(self.url, self.key, options)
+
+    def acquire(self, session_id: str) -> Client:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.pop(session_id, None)
+            if entry is not None:
+                self._stats["hits"] += 1
+                client = entry[0]
+            else:
+                self._stats["misses"] += 1
+                client = self.create()
+            self._clients[session_id] = (client, now)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                self._stats["evictions"] += 1
+            return client
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._clients.pop(session_id, None)
+
+    def _evict_idle(self, now: float):
+        # entries are in last-used order, so stop at the first fresh one
+        while self._clients:
+            sid, (_, last_used) = next(iter(self._clients.items()))
+            if now - last_used <= self.idle_ttl:
+                break
+            del self._clients[sid]
+            self._stats["evictions"] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._clients),
+                "max_clients": self.max_clients,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._clients.clear()
+        self._http.close()
@@ -0,0 +1,56 @@
+"""Unsaved form answers of one browser session, per (workstream, project).
+
+Lives in ``st.session_state``, so it is bounded: at most ``max_drafts``
+drafts are kept, the least recently opened dropped first, and each is held
+as zlib-compressed JSON of its non-empty answers rather than as live
+objects. Dates are stored as ISO strings; ``forms`` turns the answers back
+into widget values.
+"""
+import json
+import zlib
+from collections import OrderedDict
+from datetime import date
+
+from questionnaire import is_empty
+
+
+def encode(answers: dict) -> bytes | None:
+    """The non-empty ``answers`` as compressed JSON, None if there are none."""
+    kept = {qid: v for qid, v in answers.items() if not is_empty(v)}
+    if not kept:
+        return None
+    text = json.dumps(kept, separators=(",", ":"), default=lambda v: v.isoformat() if isinstance(v, date) else str(v))
+    return zlib.compress(text.encode("utf-8"))
+
+def decode(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob))
+
+
+class DraftStore:
+    def __init__(self, max_drafts: int = 20):
+        self.max_drafts = max_drafts
+        self._drafts = OrderedDict()   # (workstream, project id) -> encoded answers
+
+    def get(self, key) -> dict:
+        blob = self._drafts.get(key)
+        if blob is None:
+            return {}
+        self._drafts.move_to_end(key)
+        return decode(blob)
+
+    def put(self, key, answers: dict):
+        blob = encode(answers)
+        if blob is None:
+            self._drafts.pop(key, None)
+            return
+        if self._drafts.get(key) != blob:
+            self._drafts[key] = blob
+        self._drafts.move_to_end(key)
+        while len(self._drafts) > self.max_drafts:
+            self._drafts.popitem(last=False)
+
+    def discard(self, key):
+        self._drafts.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._drafts)
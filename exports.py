@@ -0,0 +1,191 @@
+"""Exports of parsed tracking data: Excel, CSV, Parquet and a ZIP bundle.
+
+Everything is written chunk by chunk into a file object, so a workstream can
+be streamed straight from ``TrackingCache.iter_frames`` without
+concatenating it first.
+"""
+import importlib.util
+import io
+import math
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import BinaryIO, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from questionnaire import SheetSchema
+from tracking_data import BASE_FIELDS
+
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MIME = "text/csv"
+PARQUET_MIME = "application/vnd.apache.parquet"
+ZIP_MIME = "application/zip"
+
+
+@dataclass(frozen=True)
+class ExportSource:
+    """One workstream to export. ``frames`` returns a fresh chunk iterator on
+    every call, so the same source can be written in several formats."""
+    columns: list
+    frames: Callable[[], Iterator[pd.DataFrame]]
+    sheet: SheetSchema | None = None
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+def _missing(v) -> bool:
+    if v is None or v is pd.NaT or v is pd.NA:
+        return True
+    return isinstance(v, float) and math.isnan(v)
+
+
+def _cell_value(v):
+    if v is None or v is pd.NaT or v is pd.NA:
+        return None
+    if isinstance(v, list):
+        return ", ".join(map(str, v))
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and math.isnan(v):
+        return None
+    if isinstance(v, datetime) and v.tzinfo is not None:
+        # Excel has no time zones
+        return v.replace(tzinfo=None)
+    if isinstance(v, (str, int, float, bool, date, datetime, time)):
+        return v
+    return str(v)
+
+def export_columns(answer_keys, sheet: SheetSchema | None = None) -> list:
+    """Header for a workstream export: base fields, then the answers present
+    in the data in questionnaire order, then answers no longer in the sheet."""
+    present = [k for k in answer_keys if k not in BASE_FIELDS]
+    ordered = [q.question_id for q in sheet.questions if q.question_id in present] if sheet else []
+    return [*BASE_FIELDS, *ordered, *(k for k in present if k not in ordered)]
+
+def _fill_workbook(wb: Workbook, dataframes: dict, columns: dict) -> int:
+    # write-only mode: rows are streamed out as they come, no cell tree is kept
+    rows = 0
+    for sheet_name, frames in dataframes.items():
+        ws = None
+        header = list(columns[sheet_name])
+        for chunk in frames:
+            if chunk.empty:
+                continue
+            if ws is None:
+                ws = wb.create_sheet(sheet_name)
+                ws.append([str(c) for c in header])
+            for row in chunk.reindex(columns=header).itertuples(index=False, name=None):
+                ws.append([_cell_value(v) for v in row])
+            rows += len(chunk)
+    return rows
+
+def write_excel(sources: dict, out: BinaryIO) -> int:
+    """Write-only workbook with one sheet per ``{sheet_name: ExportSource}``.
+    Returns the number of rows written."""
+    wb = Workbook(write_only=True)
+    rows = _fill_workbook(
+        wb,
+        {name: src.frames() for name, src in sources.items()},
+        {name: src.columns for name, src in sources.items()},
+    )
+    if not wb.worksheets:
+        wb.create_sheet("No data")
+    wb.save(out)
+    return rows
+
+def _flatten_lists(chunk: pd.DataFrame) -> pd.DataFrame:
+    for c in chunk.columns:
+        if chunk[c].dtype == object:
+            chunk[c] = chunk[c].map(lambda v: ", ".join(map(str, v)) if isinstance(v, list) else v)
+    return chunk
+
+def write_csv(source: ExportSource, out: BinaryIO) -> int:
+    # utf-8-sig so Excel shows the emoji status answers correctly
+    text = io.TextIOWrapper(out, encoding="utf-8-sig", newline="")
+    rows = 0
+    try:
+        header = True
+        for chunk in source.frames():
+            if chunk.empty:
+                continue
+            _flatten_lists(chunk.reindex(columns=source.columns)).to_csv(text, header=header, index=False)
+            header = False
+            rows += len(chunk)
+        if header:
+            text.write(",".join(source.columns) + "\n")
+        text.flush()
+    finally:
+        text.detach()
+    return rows
+
+def _arrow_schema(source: ExportSource):
+    import pyarrow as pa
+
+    types = {q.question_id: q.input_type.lower() for q in source.sheet.questions} if source.sheet else {}
+    arrow_types = {
+        "number": pa.float64(),
+        "number_float": pa.float64(),
+        "date": pa.timestamp("us"),
+        "checkbox": pa.bool_(),
+        "multiselect": pa.list_(pa.string()),
+        "selectbox": pa.dictionary(pa.int32(), pa.string()),
+        "radio": pa.dictionary(pa.int32(), pa.string()),
+    }
+    return pa.schema([pa.field(str(c), arrow_types.get(types.get(c), pa.string())) for c in source.columns])
+
+def _arrow_table(chunk: pd.DataFrame, schema):
+    import pyarrow as pa
+
+    arrays = []
+    for f in schema:
+        col = chunk[f.name] if f.name in chunk.columns else pd.Series([None] * len(chunk), index=chunk.index)
+        if pa.types.is_floating(f.type):
+            arrays.append(pa.array(pd.to_numeric(col, errors="coerce").astype("float64"), type=f.type, from_pandas=True))
+        elif pa.types.is_timestamp(f.type):
+            arrays.append(pa.array(pd.to_datetime(col, errors="coerce", format="ISO8601"), type=f.type, from_pandas=True))
+        elif pa.types.is_boolean(f.type):
+            arrays.append(pa.array(col.astype("boolean"), type=f.type, from_pandas=True))
+        elif pa.types.is_list(f.type):
+            arrays.append(pa.array(
+                [[str(x) for x in v] if isinstance(v, list) else (None if _missing(v) else [str(v)]) for v in col],
+                type=f.type,
+            ))
+        else:
+            strings = pa.array([None if _missing(v) else str(v) for v in col], type=pa.string())
+            arrays.append(strings.dictionary_encode() if pa.types.is_dictionary(f.type) else strings)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def write_parquet(source: ExportSource, out: BinaryIO) -> int:
+    """One row group per chunk; types follow the questionnaire's input_type."""
+    if not parquet_available():
+        raise RuntimeError("Parquet export needs the optional 'pyarrow' package.")
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(source)
+    rows = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in source.frames():
+            if chunk.empty:
+                continue
+            writer.write_table(_arrow_table(chunk, schema))
+            rows += len(chunk)
+    return rows
+
+def write_zip(sources: dict, out: BinaryIO, workbook_name: str = "all_workstreams.xlsx") -> int:
+    """CSV (and Parquet when pyarrow is installed) per source plus one
+    combined workbook, each streamed into its own archive entry."""
+    rows = 0
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, src in sources.items():
+            with zf.open(f"{name}.csv", "w", force_zip64=True) as f:
+                rows += write_csv(src, f)
+            if parquet_available():
+                with zf.open(f"{name}.parquet", "w", force_zip64=True) as f:
+                    write_parquet(src, f)
+        with zf.open(workbook_name, "w", force_zip64=True) as f:
+            write_excel(sources, f)
+    return rows
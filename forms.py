@@ -0,0 +1,149 @@
+"""Streamlit rendering of a compiled questionnaire sheet.
+
+Kept apart from app_1.py so the form can be rendered (and benchmarked)
+without running the whole app.
+"""
+from datetime import date
+
+import streamlit as st
+
+from questionnaire import Question, SheetSchema, resolve_form
+
+
+def _widget_value(q: Question, value):
+    """A draft answer as its widget's value, None if it no longer fits."""
+    itype = q.input_type.lower()
+    try:
+        if itype in ("selectbox", "radio"):
+            return value if value in q.options else None
+        if itype == "multiselect":
+            return [v for v in value if v in q.options] or None
+        if itype == "date":
+            return date.fromisoformat(value)
+        if itype == "number":
+            return int(value)
+        if itype == "number_float":
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    return value
+
+def open_draft(sheet: SheetSchema, key_prefix: str, drafts, draft_key):
+    """Point the widgets under ``key_prefix`` at ``draft_key``'s draft.
+
+    The widget keys are shared by every project of the sheet, so they are
+    cleared when another draft is opened. Widgets without state (new, or
+    dropped by Streamlit after a run that didn't draw them) are filled from
+    ``drafts``. Must run before the widgets are drawn.
+    """
+    marker = f"{key_prefix}:draft"
+    switched = st.session_state.get(marker) != draft_key
+    answers = drafts.get(draft_key)
+    for q in sheet.questions:
+        key = f"{key_prefix}:{q.question_id}"
+        if switched:
+            st.session_state.pop(key, None)
+        if key in st.session_state or q.question_id not in answers:
+            continue
+        value = _widget_value(q, answers[q.question_id])
+        if value is not None:
+            st.session_state[key] = value
+    st.session_state[marker] = draft_key
+
+def close_draft(key_prefix: str):
+    """Reload the widgets under ``key_prefix`` on the next run (after a save)."""
+    st.session_state.pop(f"{key_prefix}:draft", None)
+
+def render_form(sheet: SheetSchema, key_prefix: str, header_html: str = None, drafts=None, draft_key=None):
+    """Render ``sheet``; returns ``(saved, payload)`` like the app's forms.
+
+    With ``drafts`` (a ``drafts.DraftStore``) the answers are kept there
+    under ``draft_key`` and the widget keys are reused across drafts.
+    """
+    if drafts is not None:
+        open_draft(sheet, key_prefix, drafts, draft_key)
+    if header_html:
+        st.markdown(header_html, unsafe_allow_html=True)
+
+    # Helpers from your existing utilities
+    def _parse_float(x):
+        try: return float(x)
+        except: return None
+
+    def _parse_int(x):
+        try: return int(float(x))
+        except: return None
+
+    def render_widget(q, key):
+        itype   = q.input_type.lower()
+        label   = q.label
+        help_t  = q.help_text or None
+        options = list(q.options)
+
+        if itype == "selectbox":
+            return st.selectbox(label, options, help=help_t, key=key)
+        if itype == "radio":
+            return st.radio(label, options, help=help_t, horizontal=True, key=key)
+        if itype == "multiselect":
+            return st.multiselect(label, options, help=help_t, key=key)
+        if itype == "text_input":
+            return st.text_input(label, help=help_t, key=key)
+        if itype == "text_area":
+            return st.text_area(label, help=help_t, key=key)
+        if itype == "checkbox":
+            # initialize default
+            if key not in st.session_state:
+                st.session_state[key] = False
+            return st.checkbox(label, help=help_t, key=key)
+        if itype == "number":
+            vmin = _parse_int(q.min_value)
+            vmax = _parse_int(q.max_value)
+            vstep = _parse_int(q.step) or 1
+            kwargs = {"step": vstep, "key": key, "help": help_t}
+            if vmin is not None: kwargs["min_value"] = vmin
+            if vmax is not None: kwargs["max_value"] = vmax
+            return st.number_input(label, **kwargs)
+        if itype == "number_float":
+            vmin = _parse_float(q.min_value)
+            vmax = _parse_float(q.max_value)
+            try:
+                vstep = float(q.step) if q.step not in ("", "None") else 0.1
+            except:
+                vstep = 0.1
+            kwargs = {"step": vstep, "key": key, "help": help_t}
+            if vmin is not None: kwargs["min_value"] = vmin
+            if vmax is not None: kwargs["max_value"] = vmax
+            return st.number_input(label, **kwargs)
+        if itype == "date":
+            return st.date_input(label, help=help_t, key=key)
+
+        st.caption(f"Unknown input_type '{itype}' for {q.question_id} – skipped.")
+        return None
+
+    # Single pass in dependency order; parents are always rendered before
+    # the questions that depend on them, however deep the chain
+    current_section = None
+
+    def value_of(q):
+        nonlocal current_section
+        if q.section and q.section != current_section:
+            st.markdown(f"## {q.section}")
+            current_section = q.section
+        return render_widget(q, f"{key_prefix}:{q.question_id}")
+
+    form = resolve_form(sheet, value_of)
+    if drafts is not None:
+        drafts.put(draft_key, form.answers)
+
+    save = st.button("Save entry ✅")
+
+    if not save:
+        return False, None
+
+    # Validate required fields that are visible
+    if form.missing:
+        st.error("Please fill in the required fields:\n" + "\n".join(f"- {e}" for e in form.missing))
+        return False, None
+
+    payload = form.payload
+    return True, payload
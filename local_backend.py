@@ -0,0 +1,439 @@
+"""Offline stand-in for the Supabase project, backed by one SQLite file.
+
+``LocalBackend.client()`` returns an object with the part of the supabase
+``Client`` interface the app uses:
+
+- ``table(name)`` with ``select`` (``count="exact"``, ``head=True``),
+  ``insert``, ``upsert`` (``on_conflict``, ``ignore_duplicates``), the
+  ``eq/neq/lt/lte/gt/gte/in_`` filters, ``order``, ``range``, ``limit``
+  and ``execute()`` returning ``.data`` / ``.count``
+- ``auth.sign_in_with_password / get_user / refresh_session / sign_out``
+- ``postgrest.auth(token)``
+
+Rows are stored as JSON, so any column works, and row level security is
+imitated: admins (``app_metadata.role == "admin"`` or ``is_super_admin``)
+see everything, other users only Projekt_Data rows they own and tracking
+rows they submitted. Access tokens are HS256 JWTs signed with a per-file
+secret and carry ``app_metadata`` like Supabase's.
+
+Select it with ``DATA_BACKEND=local``. An empty file is seeded with
+``demo_users`` and a few projects per workstream (see ``seed_demo``).
+"""
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+from postgrest.exceptions import APIError
+from supabase_auth.errors import AuthApiError
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    table_name TEXT    NOT NULL,
+    id         INTEGER NOT NULL,
+    record     TEXT    NOT NULL,
+    PRIMARY KEY (table_name, id)
+);
+CREATE INDEX IF NOT EXISTS rows_submitted
+    ON rows (table_name, json_extract(record, '$.submitted_at'));
+CREATE INDEX IF NOT EXISTS rows_submission_id
+    ON rows (table_name, json_extract(record, '$.submission_id'));
+CREATE TABLE IF NOT EXISTS users (
+    id           TEXT PRIMARY KEY,
+    email        TEXT NOT NULL UNIQUE,
+    password     TEXT NOT NULL,
+    app_metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    token   TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settings (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+OWNER_COLUMNS = {"Projekt_Data": "owner_id"}
+DEFAULT_OWNER_COLUMN = "user_id"
+
+demo_users = (
+    {"email": "admin@example.org", "password": "admin", "app_metadata": {"role": "admin"}},
+    {"email": "user@example.org", "password": "user", "app_metadata": {}},
+)
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _hash_password(password: str, salt: str) -> str:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), 10_000).hex()
+
+def _is_admin(meta: dict) -> bool:
+    return str(meta.get("is_super_admin")).lower() == "true" or (meta.get("role") or "").lower() == "admin"
+
+def _path(column: str) -> str:
+    return "$." + json.dumps(column)
+
+
+class LocalBackend:
+    def __init__(self, path: Path, token_ttl: int = 3600, seed: bool = True):
+        self.path = Path(path)
+        self.token_ttl = token_ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._db() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(SCHEMA)
+            con.execute("INSERT OR IGNORE INTO settings VALUES ('jwt_secret', ?)", (secrets.token_hex(32),))
+            self._secret = con.execute("SELECT value FROM settings WHERE key = 'jwt_secret'").fetchone()[0].encode()
+            empty = con.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0
+        if seed and empty:
+            self.seed_demo()
+
+    @contextmanager
+    def _db(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def client(self) -> "LocalClient":
+        return LocalClient(self)
+
+    # =========================
+    # Users and tokens
+    # =========================
+    def add_user(self, email: str, password: str, app_metadata: dict | None = None) -> str:
+        user_id = str(uuid.uuid4())
+        salt = secrets.token_hex(8)
+        with self._db() as con:
+            con.execute(
+                "INSERT INTO users (id, email, password, app_metadata) VALUES (?, ?, ?, ?)",
+                (user_id, email.lower(), f"{salt}${_hash_password(password, salt)}", json.dumps(app_metadata or {})),
+            )
+        return user_id
+
+    def user_id(self, email: str) -> str | None:
+        with self._db() as con:
+            row = con.execute("SELECT id FROM users WHERE email = ?", (email.lower(),)).fetchone()
+        return row[0] if row else None
+
+    def _user(self, user_id: str):
+        with self._db() as con:
+            row = con.execute("SELECT id, email, app_metadata FROM users WHERE id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        return SimpleNamespace(id=row[0], email=row[1], app_metadata=json.loads(row[2]), user_metadata={})
+
+    def _session(self, user) -> SimpleNamespace:
+        now = int(time.time())
+        claims = {
+            "sub": user.id,
+            "email": user.email,
+            "role": "authenticated",
+            "iat": now,
+            "exp": now + self.token_ttl,
+            "app_metadata": user.app_metadata,
+        }
+        head = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+        body = _b64(json.dumps(claims).encode())
+        sig = _b64(hmac.new(self._secret, f"{head}.{body}".encode(), hashlib.sha256).digest())
+        refresh = secrets.token_urlsafe(24)
+        with self._db() as con:
+            con.execute("INSERT INTO refresh_tokens VALUES (?, ?)", (refresh, user.id))
+        return SimpleNamespace(
+            access_token=f"{head}.{body}.{sig}",
+            refresh_token=refresh,
+            expires_at=claims["exp"],
+            expires_in=self.token_ttl,
+            token_type="bearer",
+            user=user,
+        )
+
+    def verify(self, token: str | None) -> dict | None:
+        """Claims of a valid, unexpired access token, else ``None``."""
+        if not token:
+            return None
+        try:
+            head, body, sig = token.split(".")
+            expected = _b64(hmac.new(self._secret, f"{head}.{body}".encode(), hashlib.sha256).digest())
+            if not hmac.compare_digest(sig, expected):
+                return None
+            claims = json.loads(_unb64(body))
+        except ValueError:
+            return None
+        return claims if claims.get("exp", 0) > time.time() else None
+
+    def sign_in(self, email: str, password: str) -> SimpleNamespace:
+        with self._db() as con:
+            row = con.execute("SELECT id, password FROM users WHERE email = ?", ((email or "").lower(),)).fetchone()
+        if row is not None:
+            salt, digest = row[1].split("$", 1)
+            if hmac.compare_digest(_hash_password(password or "", salt), digest):
+                user = self._user(row[0])
+                return SimpleNamespace(user=user, session=self._session(user))
+        raise AuthApiError("Invalid login credentials", 400, "invalid_credentials")
+
+    def refresh(self, refresh_token: str) -> SimpleNamespace:
+        with self._db() as con:
+            row = con.execute("SELECT user_id FROM refresh_tokens WHERE token = ?", (refresh_token,)).fetchone()
+            con.execute("DELETE FROM refresh_tokens WHERE token = ?", (refresh_token,))
+        user = self._user(row[0]) if row else None
+        if user is None:
+            raise AuthApiError("Invalid Refresh Token", 400, "refresh_token_not_found")
+        return SimpleNamespace(user=user, session=self._session(user))
+
+    def revoke(self, user_id: str):
+        with self._db() as con:
+            con.execute("DELETE FROM refresh_tokens WHERE user_id = ?", (user_id,))
+
+    # =========================
+    # Rows
+    # =========================
+    def insert_rows(self, table_name: str, rows: list, claims: dict | None = None) -> list:
+        """Insert without access checks (seeding, benchmarks); returns the rows."""
+        out = []
+        with self._lock, self._db() as con:
+            pk = con.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM rows WHERE table_name = ?", (table_name,)
+            ).fetchone()[0]
+            created_at = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+            for row in rows:
+                pk += 1
+                row = {"id": pk, "created_at": created_at, **row}
+                if claims:
+                    row.setdefault(OWNER_COLUMNS.get(table_name, DEFAULT_OWNER_COLUMN), claims.get("sub"))
+                out.append((pk, row))
+            con.executemany(
+                "INSERT INTO rows (table_name, id, record) VALUES (?, ?, ?)",
+                [(table_name, pk, json.dumps(r, default=str)) for pk, r in out],
+            )
+        return [r for _, r in out]
+
+    def seed_demo(self, projects_per_workstream: int = 2):
+        ids = {u["email"]: self.add_user(**u) for u in demo_users}
+        owner = ids["user@example.org"]
+        projects = []
+        for ws in range(1, 6):
+            for i in range(projects_per_workstream):
+                projects.append({
+                    "Projektakronym": f"WS{ws}-DEMO{i + 1}",
+                    "Titel": f"Demo project {i + 1} in workstream {ws}",
+                    "Workstream": ws,
+                    "owner_id": owner,
+                })
+        self.insert_rows("Projekt_Data", projects)
+
+
+class LocalQuery:
+    def __init__(self, client: "LocalClient", table_name: str):
+        self.client = client
+        self.backend = client.backend
+        self.table_name = table_name
+        self._op = "select"
+        self._columns = "*"
+        self._count = None
+        self._head = False
+        self._filters = []
+        self._order = []
+        self._range = None
+        self._json = None
+        self._on_conflict = ""
+        self._ignore_duplicates = False
+        self._returning = "representation"
+
+    # --- operations
+    def select(self, *columns, count=None, head=None):
+        self._op = "select"
+        self._columns = ",".join(columns) or "*"
+        self._count = count
+        self._head = bool(head)
+        return self
+
+    def insert(self, json, *, count=None, returning=None, upsert=False, default_to_null=True):
+        self._op = "upsert" if upsert else "insert"
+        self._json = json
+        self._returning = getattr(returning, "value", returning) or "representation"
+        return self
+
+    def upsert(self, json, *, count=None, returning=None, ignore_duplicates=False, on_conflict="", default_to_null=True):
+        self._op = "upsert"
+        self._json = json
+        self._on_conflict = on_conflict or "id"
+        self._ignore_duplicates = ignore_duplicates
+        self._returning = getattr(returning, "value", returning) or "representation"
+        return self
+
+    # --- filters and modifiers
+    def _filter(self, op: str, column: str, value):
+        self._filters.append((op, column, value))
+        return self
+
+    def eq(self, column, value): return self._filter("=", column, value)
+    def neq(self, column, value): return self._filter("!=", column, value)
+    def lt(self, column, value): return self._filter("<", column, value)
+    def lte(self, column, value): return self._filter("<=", column, value)
+    def gt(self, column, value): return self._filter(">", column, value)
+    def gte(self, column, value): return self._filter(">=", column, value)
+    def in_(self, column, values): return self._filter("IN", column, list(values))
+
+    def order(self, column, *, desc=False, nullsfirst=None, foreign_table=None):
+        self._order.append((column, desc))
+        return self
+
+    def range(self, start, end, foreign_table=None):
+        self._range = (start, end - start + 1)
+        return self
+
+    def limit(self, size, *, foreign_table=None):
+        self._range = (self._range[0] if self._range else 0, size)
+        return self
+
+    # --- execution
+    def _where(self, claims: dict) -> tuple:
+        sql = ["table_name = ?"]
+        args = [self.table_name]
+        if not _is_admin(claims.get("app_metadata") or {}):
+            sql.append("json_extract(record, ?) = ?")
+            args += [_path(OWNER_COLUMNS.get(self.table_name, DEFAULT_OWNER_COLUMN)), claims.get("sub")]
+        for op, column, value in self._filters:
+            if op == "IN":
+                sql.append(f"json_extract(record, ?) IN ({','.join('?' * len(value)) or 'NULL'})")
+                args += [_path(column), *value]
+            else:
+                sql.append(f"json_extract(record, ?) {op} ?")
+                args += [_path(column), value]
+        return " AND ".join(sql), args
+
+    def _project(self, record: dict) -> dict:
+        if self._columns.strip() == "*":
+            return record
+        return {c: record.get(c) for c in (c.strip() for c in self._columns.split(",")) if c}
+
+    def execute(self):
+        claims = self.backend.verify(self.client.postgrest.token)
+        if claims is None:
+            # anon key only: RLS lets nothing through
+            if self._op == "select":
+                return SimpleNamespace(data=[], count=0 if self._count else None)
+            raise APIError({"message": "new row violates row-level security policy", "code": "42501"})
+        if self._op == "select":
+            return self._select(claims)
+        return self._write(claims)
+
+    def _select(self, claims: dict):
+        where, args = self._where(claims)
+        count = None
+        with self.backend._db() as con:
+            if self._count:
+                count = con.execute(f"SELECT COUNT(*) FROM rows WHERE {where}", args).fetchone()[0]
+            if self._head:
+                return SimpleNamespace(data=[], count=count)
+            sql = f"SELECT record FROM rows WHERE {where}"
+            order_args = []
+            if self._order:
+                sql += " ORDER BY " + ", ".join(f"json_extract(record, ?) {'DESC' if d else 'ASC'}" for _, d in self._order)
+                order_args = [_path(c) for c, _ in self._order]
+            if self._range:
+                sql += f" LIMIT {int(self._range[1])} OFFSET {int(self._range[0])}"
+            rows = con.execute(sql, args + order_args).fetchall()
+        return SimpleNamespace(data=[self._project(json.loads(r[0])) for r in rows], count=count)
+
+    def _write(self, claims: dict):
+        rows = self._json if isinstance(self._json, list) else [self._json]
+        owner = OWNER_COLUMNS.get(self.table_name, DEFAULT_OWNER_COLUMN)
+        if not _is_admin(claims.get("app_metadata") or {}) and any(r.get(owner, claims["sub"]) != claims["sub"] for r in rows):
+            raise APIError({"message": "new row violates row-level security policy", "code": "42501"})
+        if self._op == "upsert" and self._on_conflict:
+            keys = [r.get(self._on_conflict) for r in rows if r.get(self._on_conflict) is not None]
+            with self.backend._db() as con:
+                existing = {
+                    row[0] for row in con.execute(
+                        f"SELECT json_extract(record, ?) FROM rows WHERE table_name = ? "
+                        f"AND json_extract(record, ?) IN ({','.join('?' * len(keys)) or 'NULL'})",
+                        [_path(self._on_conflict), self.table_name, _path(self._on_conflict), *keys],
+                    )
+                }
+            if not self._ignore_duplicates and existing:
+                self._merge([r for r in rows if r.get(self._on_conflict) in existing])
+            rows = [r for r in rows if r.get(self._on_conflict) not in existing]
+        inserted = self.backend.insert_rows(self.table_name, rows, claims)
+        return SimpleNamespace(data=inserted if self._returning == "representation" else [], count=None)
+
+    def _merge(self, rows: list):
+        with self.backend._lock, self.backend._db() as con:
+            for r in rows:
+                con.execute(
+                    "UPDATE rows SET record = json_patch(record, ?) WHERE table_name = ? AND json_extract(record, ?) = ?",
+                    (json.dumps(r, default=str), self.table_name, _path(self._on_conflict), r[self._on_conflict]),
+                )
+
+
+class LocalPostgrest:
+    def __init__(self):
+        self.token = None
+
+    def auth(self, token: str | None):
+        self.token = token
+
+
+class LocalAuth:
+    def __init__(self, client: "LocalClient"):
+        self.client = client
+        self._session = None
+
+    def sign_in_with_password(self, credentials: dict):
+        res = self.client.backend.sign_in(credentials.get("email", ""), credentials.get("password", ""))
+        self._session = res.session
+        return res
+
+    def refresh_session(self, refresh_token: str | None = None):
+        res = self.client.backend.refresh(refresh_token or (self._session.refresh_token if self._session else ""))
+        self._session = res.session
+        return res
+
+    def set_session(self, access_token: str, refresh_token: str):
+        claims = self.client.backend.verify(access_token)
+        if claims is None:
+            return self.refresh_session(refresh_token)
+        user = self.client.backend._user(claims["sub"])
+        self._session = SimpleNamespace(access_token=access_token, refresh_token=refresh_token, user=user)
+        return SimpleNamespace(user=user, session=self._session)
+
+    def get_user(self, jwt: str | None = None):
+        token = jwt or (self._session.access_token if self._session else None)
+        claims = self.client.backend.verify(token)
+        if claims is None:
+            raise AuthApiError("invalid JWT: unable to parse or verify signature", 403, "bad_jwt")
+        return SimpleNamespace(user=self.client.backend._user(claims["sub"]))
+
+    def sign_out(self, options=None):
+        if self._session:
+            self.client.backend.revoke(self._session.user.id)
+        self._session = None
+
+
+class LocalClient:
+    def __init__(self, backend: LocalBackend):
+        self.backend = backend
+        self.postgrest = LocalPostgrest()
+        self.auth = LocalAuth(self)
+
+    def table(self, table_name: str) -> LocalQuery:
+        return LocalQuery(self, table_name)
+
+    from_ = table
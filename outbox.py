@@ -0,0 +1,266 @@
+"""Durable outbox for tracking submissions.
+
+A submission is written to a local SQLite file and the form returns at once;
+``OutboxWorker`` sends it to its Tracking_WS table in the background. Every
+row carries a ``submission_id`` and is sent as an upsert that ignores
+conflicts on that column, so a retry after a lost response never inserts the
+entry twice (needs the unique column from
+supabase/migrations/20261018000000_tracking_submission_id.sql).
+
+Rows are sent with the submitting user's access token, so row level security
+and column defaults behave as for a direct insert. A row whose token has
+expired waits until the same user signs in or refreshes again (see
+``Outbox.update_token``), for at most ``token_wait`` seconds; then it is
+marked failed. The token is only kept while a row can still be sent: sent
+rows are deleted and failed rows keep no token.
+"""
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from postgrest.types import ReturnMethod
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    seq             INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id   TEXT    NOT NULL UNIQUE,
+    table_name      TEXT    NOT NULL,
+    row             TEXT    NOT NULL,
+    user_key        TEXT    NOT NULL,
+    token           TEXT    NOT NULL,
+    expires_at      REAL    NOT NULL,
+    created_at      REAL    NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL    NOT NULL,
+    claimed_until   REAL    NOT NULL DEFAULT 0,
+    last_error      TEXT,
+    status          TEXT    NOT NULL DEFAULT 'pending'
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS outbox_user ON outbox (user_key, status);
+"""
+
+
+class Outbox:
+    def __init__(
+        self,
+        path: Path,
+        base_delay: float = 2,
+        max_delay: float = 300,
+        max_attempts: int = 20,
+        lease: float = 60,
+        token_wait: float = 3 * 86400,
+    ):
+        self.path = Path(path)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        # a claimed row is left alone by other workers (processes) this long
+        self.lease = lease
+        # how long a row whose token expired waits for its user to sign in again
+        self.token_wait = token_wait
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._db() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(SCHEMA)
+
+    @contextmanager
+    def _db(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def enqueue(self, table_name: str, row: dict, user_key: str, token: str, expires_at: float = 0) -> str:
+        """Store ``row`` for ``table_name``; returns its submission_id."""
+        submission_id = row.get("submission_id") or str(uuid.uuid4())
+        row = {**row, "submission_id": submission_id}
+        now = time.time()
+        with self._db() as con:
+            con.execute(
+                """INSERT OR IGNORE INTO outbox
+                   (submission_id, table_name, row, user_key, token, expires_at, created_at, next_attempt_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (submission_id, table_name, json.dumps(row, default=str), user_key, token,
+                 expires_at or float("inf"), now, now),
+            )
+        return submission_id
+
+    def update_token(self, user_key: str, token: str, expires_at: float = 0):
+        """Hand a fresh access token to the user's unsent rows."""
+        with self._db() as con:
+            con.execute(
+                "UPDATE outbox SET token = ?, expires_at = ? WHERE user_key = ? AND status = 'pending'",
+                (token, expires_at or float("inf"), user_key),
+            )
+
+    def pending(self, user_key: str | None = None) -> int:
+        with self._db() as con:
+            if user_key is None:
+                return con.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+            return con.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status = 'pending' AND user_key = ?", (user_key,)
+            ).fetchone()[0]
+
+    def next_due_in(self) -> float | None:
+        """Seconds until the next row can be sent, ``None`` if there is none."""
+        now = time.time()
+        with self._db() as con:
+            due = con.execute(
+                """SELECT MIN(MAX(next_attempt_at, claimed_until)) FROM outbox
+                   WHERE status = 'pending' AND expires_at > ?""",
+                (now,),
+            ).fetchone()[0]
+        return None if due is None else max(0.0, due - now)
+
+    def expire_stale(self) -> int:
+        """Mark failed the rows that waited ``token_wait`` for a fresh token."""
+        now = time.time()
+        with self._db() as con:
+            return con.execute(
+                """UPDATE outbox SET status = 'failed', token = '', claimed_until = 0,
+                   last_error = 'access token expired and the user did not sign in again'
+                   WHERE status = 'pending' AND expires_at + ? <= ?""",
+                (self.token_wait, now),
+            ).rowcount
+
+    def claim(self, limit: int) -> list:
+        """Lease up to ``limit`` due rows to this worker, oldest first."""
+        now = time.time()
+        with self._db() as con:
+            rows = con.execute(
+                """UPDATE outbox SET claimed_until = ?
+                   WHERE seq IN (
+                       SELECT seq FROM outbox
+                       WHERE status = 'pending' AND next_attempt_at <= ?
+                         AND claimed_until <= ? AND expires_at > ?
+                       ORDER BY seq LIMIT ?)
+                   RETURNING seq, table_name, row, token""",
+                (now + self.lease, now, now, now, limit),
+            ).fetchall()
+        rows.sort()
+        return [{"seq": r[0], "table_name": r[1], "row": json.loads(r[2]), "token": r[3]} for r in rows]
+
+    def mark_sent(self, seqs: list):
+        with self._db() as con:
+            con.executemany("DELETE FROM outbox WHERE seq = ?", [(s,) for s in seqs])
+
+    def mark_failed(self, seqs: list, error: str):
+        now = time.time()
+        with self._db() as con:
+            for seq in seqs:
+                attempts = con.execute("SELECT attempts FROM outbox WHERE seq = ?", (seq,)).fetchone()
+                if attempts is None:
+                    continue
+                attempts = attempts[0] + 1
+                # exponential backoff with jitter, so failed rows don't retry in lockstep
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1)) * random.uniform(0.5, 1)
+                if attempts >= self.max_attempts:
+                    con.execute(
+                        """UPDATE outbox SET attempts = ?, claimed_until = 0, last_error = ?,
+                           status = 'failed', token = '' WHERE seq = ?""",
+                        (attempts, error[:2000], seq),
+                    )
+                else:
+                    con.execute(
+                        """UPDATE outbox SET attempts = ?, next_attempt_at = ?, claimed_until = 0,
+                           last_error = ? WHERE seq = ?""",
+                        (attempts, now + delay, error[:2000], seq),
+                    )
+
+    def failed(self) -> list:
+        """Rows that ran out of attempts; kept for inspection, never resent."""
+        with self._db() as con:
+            rows = con.execute(
+                "SELECT submission_id, table_name, attempts, last_error FROM outbox WHERE status = 'failed' ORDER BY seq"
+            ).fetchall()
+        return [dict(zip(("submission_id", "table_name", "attempts", "last_error"), r)) for r in rows]
+
+    def flush(self, client, batch_size: int = 50) -> int:
+        """Send due rows, one upsert per (table, token); returns rows sent."""
+        self.expire_stale()
+        items = self.claim(batch_size)
+        batches = {}
+        for item in items:
+            batches.setdefault((item["table_name"], item["token"]), []).append(item)
+        sent = 0
+        for (table_name, token), batch in batches.items():
+            client.postgrest.auth(token)
+            try:
+                self._send(client, table_name, batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    self.mark_failed([batch[0]["seq"]], str(e))
+                    continue
+                # one bad row must not hold back the rest: retry them one by one
+                for item in batch:
+                    try:
+                        self._send(client, table_name, [item])
+                    except Exception as e:
+                        self.mark_failed([item["seq"]], str(e))
+                    else:
+                        self.mark_sent([item["seq"]])
+                        sent += 1
+            else:
+                self.mark_sent([i["seq"] for i in batch])
+                sent += len(batch)
+        return sent
+
+    @staticmethod
+    def _send(client, table_name: str, batch: list):
+        (
+            client.table(table_name)
+            .upsert(
+                [i["row"] for i in batch],
+                on_conflict="submission_id",
+                ignore_duplicates=True,
+                returning=ReturnMethod.minimal,
+            )
+            .execute()
+        )
+
+
+class OutboxWorker(threading.Thread):
+    """Daemon thread that flushes the outbox; ``notify`` wakes it early."""
+
+    def __init__(self, outbox: Outbox, client, batch_size: int = 50, interval: float = 5):
+        super().__init__(name="tracking-outbox", daemon=True)
+        self.outbox = outbox
+        self.client = client
+        self.batch_size = batch_size
+        self.interval = interval
+        self._wake = threading.Event()
+        # not "_stop": threading.Thread uses that name itself (join, is_alive)
+        self._stopping = threading.Event()
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                sent = self.outbox.flush(self.client, self.batch_size)
+                # a full batch means there is probably more waiting
+                wait = 0 if sent >= self.batch_size else self.outbox.next_due_in()
+            except Exception:
+                log.exception("Tracking outbox flush failed")
+                sent, wait = 0, self.interval
+            if wait is None or wait > self.interval:
+                wait = self.interval
+            if wait > 0 or not sent:
+                self._wake.wait(max(wait, 0.1))
+            self._wake.clear()
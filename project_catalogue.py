@@ -0,0 +1,67 @@
+"""Indexed project list for the project table and the project selector.
+
+Built once per loaded project list: an id -> label dict for the selector
+and a lowercased search column, so filtering and paging are vectorized
+lookups instead of list scans on every rerun.
+"""
+from dataclasses import dataclass
+from typing import Mapping
+
+import pandas as pd
+
+LABEL_COLUMNS = ("Projektakronym", "Titel")
+
+
+@dataclass(frozen=True)
+class ProjectCatalogue:
+    frame: pd.DataFrame
+    labels: Mapping
+    search_text: pd.Series
+    workstreams: pd.Series
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ProjectCatalogue":
+        """``df`` as loaded from Projekt_Data; must have an ``id`` column."""
+        if "id" not in df.columns:
+            raise ValueError("Expected 'id' column not found in table.")
+        df = df.set_index("id", drop=True)
+        label_col = next((c for c in LABEL_COLUMNS if c in df.columns), None)
+        labels = df[label_col].where(df[label_col].notna(), df.index.astype(str)) if label_col else df.index.to_series()
+        text_cols = [c for c in LABEL_COLUMNS if c in df.columns]
+        search_text = pd.Series("", index=df.index)
+        for c in text_cols:
+            search_text = search_text + " " + df[c].fillna("").astype(str).str.lower()
+        workstreams = (
+            pd.to_numeric(df["Workstream"], errors="coerce").astype("Int64")
+            if "Workstream" in df.columns else pd.Series(pd.NA, index=df.index, dtype="Int64")
+        )
+        return cls(df, dict(zip(df.index, labels.astype(str))), search_text, workstreams)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    def label(self, project_id) -> str:
+        return self.labels.get(project_id, str(project_id))
+
+    def workstream(self, project_id) -> int | None:
+        ws = self.workstreams.get(project_id, pd.NA)
+        return None if pd.isna(ws) else int(ws)
+
+    def filter(self, query: str = "", workstreams=None) -> pd.Index:
+        """Ids matching every word of ``query`` (acronym or title) and, if
+        given, one of ``workstreams``; in list order."""
+        mask = pd.Series(True, index=self.frame.index)
+        for word in query.lower().split():
+            mask &= self.search_text.str.contains(word, regex=False)
+        if workstreams:
+            mask &= self.workstreams.isin(list(workstreams)).fillna(False).astype(bool)
+        return self.frame.index[mask.to_numpy()]
+
+    def page(self, ids: pd.Index, page: int, page_size: int) -> pd.DataFrame:
+        """Rows of page ``page`` (1-based) of ``ids``."""
+        start = (max(page, 1) - 1) * page_size
+        return self.frame.loc[ids[start:start + page_size]]
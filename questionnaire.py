@@ -0,0 +1,395 @@
+"""Compiled questionnaire schema for tracking_questions.xlsx.
+
+The workbook is parsed once into immutable objects and shared by every
+session. The registry re-checks the file on access and recompiles only when
+its content changes; a JSON sidecar lets a cold start skip openpyxl.
+
+Each sheet is compiled into a dependency DAG over condition_field, so a
+form resolves in one pass over ``SheetSchema.order``.
+"""
+import hashlib
+import heapq
+import json
+import os
+import threading
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+
+import pandas as pd
+
+TITLES_SHEET = "Titles"
+SCHEMA_FORMAT = 3
+
+QUESTION_COLUMNS = [
+    "question_id","section","label","input_type","options","help_text",
+    "required","condition_field","condition_value",
+    "min_value","max_value","step",
+    "required_if_field","required_if_value"
+]
+
+class SchemaError(ValueError):
+    pass
+
+# =========================
+# Schema objects
+# =========================
+@dataclass(frozen=True)
+class Question:
+    question_id: str
+    section: str
+    label: str
+    input_type: str
+    options: tuple
+    help_text: str
+    required: bool
+    condition_field: str
+    condition_value: str
+    min_value: str
+    max_value: str
+    step: str
+    required_if_field: str
+    required_if_value: str
+
+
+@dataclass(frozen=True)
+class SheetSchema:
+    name: str
+    questions: tuple
+    title: str = ""
+    subtitle: str = ""
+    header_label: str = ""
+    header_help: str = ""
+    # question indexes in dependency order (parents before dependents)
+    order: tuple = ()
+
+    def to_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame([asdict(q) for q in self.questions], columns=QUESTION_COLUMNS)
+        df["options"] = df["options"].map(lambda o: "|".join(o))
+        return df
+
+
+@dataclass(frozen=True)
+class QuestionnaireSchema:
+    source: str
+    fingerprint: str
+    sheets: Mapping
+
+    def sheet(self, name: str) -> SheetSchema:
+        try:
+            return self.sheets[name]
+        except KeyError:
+            raise KeyError(f"Sheet '{name}' not found in {self.source}") from None
+
+    def to_dict(self) -> dict:
+        return {
+            "format": SCHEMA_FORMAT,
+            "source": self.source,
+            "fingerprint": self.fingerprint,
+            "sheets": {
+                name: {
+                    **{f.name: getattr(s, f.name) for f in fields(s)},
+                    "questions": [asdict(q) for q in s.questions],
+                }
+                for name, s in self.sheets.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuestionnaireSchema":
+        sheets = {}
+        for name, s in data["sheets"].items():
+            questions = tuple(
+                Question(**{**q, "options": tuple(q["options"])}) for q in s["questions"]
+            )
+            sheets[name] = SheetSchema(**{
+                **s,
+                "questions": questions,
+                "order": tuple(s["order"]),
+            })
+        return cls(data["source"], data["fingerprint"], MappingProxyType(sheets))
+
+# =========================
+# Compilation
+# =========================
+def _text(val) -> str:
+    if val is None or (isinstance(val, float) and pd.isna(val)):
+        return ""
+    return str(val).strip()
+
+def _compile_sheet(name: str, df: pd.DataFrame, titles: dict) -> SheetSchema:
+    df = df.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    for c in QUESTION_COLUMNS:
+        if c not in df.columns:
+            df[c] = ""
+    df = df.fillna("")
+    required = df["required"].astype(str).str.strip().str.upper().eq("TRUE")
+
+    questions = []
+    for rec, req in zip(df[QUESTION_COLUMNS].to_dict("records"), required):
+        options = tuple(o.strip() for o in str(rec["options"]).split("|")) if rec["options"] else ()
+        questions.append(Question(**{
+            **{c: _text(rec[c]) for c in QUESTION_COLUMNS},
+            "options": options,
+            "required": bool(req),
+        }))
+
+    order = _link_sheet(name, questions)
+    header = next((q for q in questions if q.input_type.lower() == "header"), None)
+    title, subtitle = titles.get(name, ("", ""))
+    return SheetSchema(
+        name=name,
+        questions=tuple(questions),
+        title=title,
+        subtitle=subtitle,
+        header_label=header.label if header else "",
+        header_help=header.help_text if header else "",
+        order=order,
+    )
+
+def _link_sheet(name: str, questions: list) -> tuple:
+    index = {}
+    problems = []
+    for i, q in enumerate(questions):
+        if not q.question_id:
+            continue
+        if q.question_id in index:
+            problems.append(f"duplicate question_id '{q.question_id}'")
+        index[q.question_id] = i
+
+    # parents[i] = indexes question i's visibility depends on; required_if
+    # is checked once all answers are known, so it adds no edge
+    parents = [set() for _ in questions]
+    for i, q in enumerate(questions):
+        if not q.condition_field:
+            continue
+        if q.condition_field not in index:
+            problems.append(f"'{q.question_id}' has condition_field '{q.condition_field}' which is not a question in the sheet")
+            continue
+        parents[i].add(index[q.condition_field])
+
+    # Kahn's algorithm, smallest sheet row first so the sheet order is kept
+    # wherever the dependencies allow it
+    children = [[] for _ in questions]
+    pending = [len(p) for p in parents]
+    for i, ps in enumerate(parents):
+        for p in ps:
+            children[p].append(i)
+    ready = [i for i, n in enumerate(pending) if n == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        i = heapq.heappop(ready)
+        order.append(i)
+        for c in children[i]:
+            pending[c] -= 1
+            if pending[c] == 0:
+                heapq.heappush(ready, c)
+    if len(order) < len(questions):
+        cyclic = [questions[i].question_id for i, n in enumerate(pending) if n > 0]
+        problems.append("dependency cycle between " + ", ".join(f"'{q}'" for q in cyclic))
+
+    if problems:
+        raise SchemaError(f"Invalid questionnaire sheet '{name}':\n" + "\n".join(f"- {p}" for p in problems))
+    return tuple(order)
+
+def _compile_titles(df: pd.DataFrame) -> dict:
+    df = df.copy()
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    if "sheet" not in df.columns:
+        return {}
+    titles = {}
+    for rec in df.to_dict("records"):
+        sheet = _text(rec.get("sheet"))
+        if sheet and sheet not in titles:
+            titles[sheet] = (_text(rec.get("title")), _text(rec.get("subtitle")))
+    return titles
+
+def compile_workbook(path: Path, fingerprint: str = "") -> QuestionnaireSchema:
+    path = Path(path)
+    frames = pd.read_excel(path, sheet_name=None)
+    titles = _compile_titles(frames[TITLES_SHEET]) if TITLES_SHEET in frames else {}
+    sheets = {
+        name: _compile_sheet(name, df, titles)
+        for name, df in frames.items() if name != TITLES_SHEET
+    }
+    return QuestionnaireSchema(path.name, fingerprint or file_digest(path), MappingProxyType(sheets))
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# =========================
+# Form resolution
+# =========================
+@dataclass
+class FormState:
+    answers: dict
+    missing: list
+    payload: dict
+
+# how a checkbox answer may be spelled in an imported file or an older row
+TRUE_WORDS = {"true", "yes", "ja", "y", "x", "1"}
+FALSE_WORDS = {"false", "no", "nej", "n", "0"}
+
+def is_empty(val) -> bool:
+    if val is None: return True
+    if isinstance(val, str): return val.strip() == ""
+    if isinstance(val, list): return len(val) == 0
+    return False
+
+def payload_value(val):
+    if isinstance(val, list):
+        return ", ".join(map(str, val)) if val else None
+    if isinstance(val, str):
+        return val.strip() or None
+    return val
+
+def split_multiselect(val, options) -> list:
+    """Inverse of ``payload_value`` for multiselect answers.
+
+    The payload joins choices with ", ", and an option may itself contain
+    ", ", so known options are matched first (longest wins).
+    """
+    if isinstance(val, list):
+        return val
+    if is_empty(val) or (isinstance(val, float) and val != val):
+        return []
+    rest = str(val)
+    if rest in options:
+        return [rest]
+    by_length = sorted(options, key=len, reverse=True)
+    out = []
+    while rest:
+        match = next((o for o in by_length if rest == o or rest.startswith(o + ", ")), None)
+        if match is None:
+            out.extend(rest.split(", "))
+            break
+        out.append(match)
+        rest = rest[len(match) + 2:]
+    return out
+
+def is_visible(q: Question, answers: dict) -> bool:
+    if not q.condition_field:
+        return True
+    return str(answers.get(q.condition_field, "")) == q.condition_value
+
+def is_required_now(q: Question, answers: dict) -> bool:
+    if q.required:
+        return True
+    if q.required_if_field:
+        return str(answers.get(q.required_if_field, "")) == q.required_if_value
+    return False
+
+def resolve_form(sheet: SheetSchema, value_of: Callable[[Question], Any]) -> FormState:
+    """Walk the sheet once in dependency order.
+
+    ``value_of`` is called for every visible question (the app renders the
+    widget there); answers of hidden questions are never requested.
+    """
+    answers = {}
+    shown = set()
+    for i in sheet.order:
+        q = sheet.questions[i]
+        if is_visible(q, answers):
+            answers[q.question_id] = value_of(q)
+            shown.add(i)
+
+    # required_if may point at a later question, so required-ness is checked
+    # once every answer is known, in sheet order
+    missing = []
+    payload = {}
+    for i, q in enumerate(sheet.questions):
+        if i not in shown:
+            continue
+        val = answers.get(q.question_id)
+        if is_required_now(q, answers) and is_empty(val):
+            missing.append(q.label)
+        payload[q.question_id] = payload_value(val)
+    return FormState(answers, missing, payload)
+
+# =========================
+# Registry
+# =========================
+class QuestionnaireRegistry:
+    def __init__(self, path: Path, sidecar_path: Path | None = None, store=None):
+        self.path = Path(path)
+        self.sidecar_path = Path(sidecar_path) if sidecar_path else None
+        # optional shared_cache.SharedCache: one compile per host, not per process
+        self.store = store
+        self._lock = threading.Lock()
+        self._schema: QuestionnaireSchema | None = None
+        self._stat_key = None
+
+    def _current_stat_key(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Excel file not found at {self.path}") from None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self) -> QuestionnaireSchema:
+        stat_key = self._current_stat_key()
+        schema = self._schema
+        if schema is not None and stat_key == self._stat_key:
+            return schema
+
+        with self._lock:
+            if self._schema is not None and stat_key == self._stat_key:
+                return self._schema
+            # mtime changed: only recompile if the content actually differs
+            digest = file_digest(self.path)
+            if self._schema is None or self._schema.fingerprint != digest:
+                self._schema = self._load(digest)
+            self._stat_key = stat_key
+            return self._schema
+
+    def sheet(self, name: str) -> SheetSchema:
+        return self.get().sheet(name)
+
+    def _load(self, digest: str) -> QuestionnaireSchema:
+        if self.store is None:
+            return self._read_sidecar(digest) or self._compile(digest)
+        data = self.store.get_or_compute(
+            f"questionnaire:{self.path.resolve()}",
+            lambda: (self._read_sidecar(digest) or self._compile(digest)).to_dict(),
+            version=f"{digest}:{SCHEMA_FORMAT}",
+            dumps=lambda d: json.dumps(d, ensure_ascii=False).encode("utf-8"),
+            loads=json.loads,
+        )
+        return QuestionnaireSchema.from_dict(data)
+
+    def _compile(self, digest: str) -> QuestionnaireSchema:
+        schema = compile_workbook(self.path, digest)
+        self._write_sidecar(schema)
+        return schema
+
+    def _read_sidecar(self, digest: str) -> QuestionnaireSchema | None:
+        if not self.sidecar_path or not self.sidecar_path.exists():
+            return None
+        try:
+            data = json.loads(self.sidecar_path.read_text(encoding="utf-8"))
+            if data.get("format") != SCHEMA_FORMAT or data.get("fingerprint") != digest:
+                return None
+            return QuestionnaireSchema.from_dict(data)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_sidecar(self, schema: QuestionnaireSchema):
+        if not self.sidecar_path:
+            return
+        tmp = self.sidecar_path.with_name(f"{self.sidecar_path.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps(schema.to_dict(), ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.sidecar_path)
+        except OSError:
+            # read-only deployments just run without the sidecar
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
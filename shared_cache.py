@@ -0,0 +1,202 @@
+"""Cache shared by every server process on a host, in one SQLite file.
+
+Entries map a key to a value computed from some version of its inputs (a
+questionnaire fingerprint, a row count, a generation counter). A read with
+another version is a miss, so stale entries are never served and never have
+to be deleted; they are overwritten or evicted. Entries may also expire
+(``ttl``), and the file is kept under ``max_bytes`` by dropping the least
+recently read entries first.
+
+``get_or_compute`` takes a lease on the key, so when several processes miss
+at once one of them computes and the others wait for its result.
+
+Values are pickled unless the caller passes its own ``dumps``/``loads``;
+the file must only be writable by the app.
+"""
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    version     TEXT NOT NULL,
+    value       BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    expires_at  REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS leases (
+    key        TEXT PRIMARY KEY,
+    owner      TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS generations (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+# Bump when what is stored changes shape; a file in another format is cleared
+FORMAT = 1
+
+_MISS = object()
+
+
+class SharedCache:
+    def __init__(self, path: Path, max_bytes: int = 512 * 2**20, lease: float = 120, touch_interval: float = 10):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.lease = lease
+        # reads refresh accessed_at at most this often (LRU order is approximate)
+        self.touch_interval = touch_interval
+        self._stats = {"hits": 0, "misses": 0, "computed": 0}
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._db() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(SCHEMA)
+            if con.execute("PRAGMA user_version").fetchone()[0] != FORMAT:
+                con.execute("DELETE FROM entries")
+                con.execute(f"PRAGMA user_version = {FORMAT}")
+
+    @contextmanager
+    def _db(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get(self, key: str, version: str = "", loads: Callable[[bytes], Any] = pickle.loads, default=None):
+        now = time.time()
+        with self._db() as con:
+            row = con.execute(
+                "SELECT version, value, expires_at, accessed_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[0] != version or (row[2] is not None and row[2] <= now):
+                self._count("misses")
+                return default
+            if now - row[3] > self.touch_interval:
+                con.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return loads(row[1])
+
+    def set(self, key: str, value, version: str = "", ttl: float | None = None,
+            dumps: Callable[[Any], bytes] = pickle.dumps):
+        blob = dumps(value)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._db() as con:
+            con.execute(
+                """INSERT INTO entries (key, version, value, size, expires_at, accessed_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (key) DO UPDATE SET
+                       version = excluded.version, value = excluded.value, size = excluded.size,
+                       expires_at = excluded.expires_at, accessed_at = excluded.accessed_at""",
+                (key, version, blob, len(blob), now + ttl if ttl else None, now),
+            )
+            self._evict(con, now)
+
+    def _evict(self, con, now: float):
+        con.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        total = con.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in con.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            doomed.append((key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        con.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    # =========================
+    # Compute once per host
+    # =========================
+    def _acquire(self, key: str, owner: str) -> bool:
+        now = time.time()
+        with self._db() as con:
+            cur = con.execute(
+                """INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?)
+                   ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                   WHERE leases.expires_at < ?""",
+                (key, owner, now + self.lease, now),
+            )
+            return cur.rowcount == 1
+
+    def _release(self, key: str, owner: str):
+        with self._db() as con:
+            con.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], version: str = "", ttl: float | None = None,
+                       dumps: Callable[[Any], bytes] = pickle.dumps, loads: Callable[[bytes], Any] = pickle.loads,
+                       wait: float = 60):
+        """The cached value, or ``compute()`` stored under ``version``.
+
+        While another process or thread holds the key's lease, waits up to
+        ``wait`` seconds for its result, then computes without it.
+        """
+        value = self.get(key, version, loads, _MISS)
+        if value is not _MISS:
+            return value
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + wait
+        delay = 0.02
+        while not self._acquire(key, owner):
+            if time.monotonic() > deadline:
+                return compute()
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+            value = self.get(key, version, loads, _MISS)
+            if value is not _MISS:
+                return value
+        try:
+            # the previous lease holder may have stored it just now
+            value = self.get(key, version, loads, _MISS)
+            if value is not _MISS:
+                return value
+            value = compute()
+            self._count("computed")
+            self.set(key, value, version, ttl, dumps)
+            return value
+        finally:
+            self._release(key, owner)
+
+    # =========================
+    # Generations
+    # =========================
+    def generation(self, *keys: str) -> tuple:
+        """Current counters of ``keys`` (0 if never bumped), for use in versions."""
+        with self._db() as con:
+            rows = dict(con.execute(
+                f"SELECT key, value FROM generations WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall())
+        return tuple(rows.get(k, 0) for k in keys)
+
+    def bump(self, key: str) -> int:
+        """Invalidate everything versioned by ``key``'s generation, on every process."""
+        with self._db() as con:
+            return con.execute(
+                """INSERT INTO generations (key, value) VALUES (?, 1)
+                   ON CONFLICT (key) DO UPDATE SET value = value + 1
+                   RETURNING value""",
+                (key,),
+            ).fetchone()[0]
+
+    def metrics(self) -> dict:
+        with self._db() as con:
+            entries, size = con.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        with self._lock:
+            return {**self._stats, "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
@@ -0,0 +1,16 @@
+-- Idempotency key for tracking submissions sent through the app's outbox
+-- (outbox.py). Retries upsert with ON CONFLICT (submission_id) DO NOTHING,
+-- which needs a unique constraint on the column. Existing rows keep NULL.
+do $$
+declare
+  t text;
+begin
+  foreach t in array array['Tracking_WS1', 'Tracking_WS2', 'Tracking_WS3', 'Tracking_WS4', 'Tracking_WS5'] loop
+    execute format('alter table public.%I add column if not exists submission_id uuid', t);
+    if not exists (
+      select 1 from pg_constraint where conname = t || '_submission_id_key'
+    ) then
+      execute format('alter table public.%I add constraint %I unique (submission_id)', t, t || '_submission_id_key');
+    end if;
+  end loop;
+end $$;
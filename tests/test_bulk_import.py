@@ -0,0 +1,97 @@
+import io
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from bulk_import import read_import_file, validate_import
+from questionnaire import _compile_sheet
+
+
+@pytest.fixture
+def sheet():
+    return _compile_sheet("WS1", pd.DataFrame([
+        {"question_id": "phase", "label": "Phase", "input_type": "selectbox", "options": "Pilot|Full scale", "required": "TRUE"},
+        {"question_id": "capacity", "label": "Capacity", "input_type": "number", "min_value": "0"},
+        {"question_id": "site", "label": "Site", "input_type": "text_input",
+         "condition_field": "phase", "condition_value": "Full scale", "required": "TRUE"},
+        {"question_id": "notes", "label": "Notes", "input_type": "text_area",
+         "required_if_field": "done", "required_if_value": "True"},
+        {"question_id": "done", "label": "Done", "input_type": "checkbox"},
+    ]), {})
+
+def errors_of(result) -> list:
+    return list(result.errors[["row", "question_id"]].itertuples(index=False, name=None))
+
+
+def test_valid_rows_become_entries(sheet):
+    df = pd.DataFrame([
+        {"project_id": "1", "phase": "Pilot", "capacity": "12", "submitted_at": "2021-03-01"},
+        {"project_id": "2", "phase": "Full scale", "site": "Esbjerg"},
+    ])
+    result = validate_import(df, sheet, "WS1", form_title="Tracking", known_projects=("1", "2"), source_digest="d")
+
+    assert result.errors.empty and result.total == 2
+    first, second = result.rows
+    assert first["answers"] == {"phase": "Pilot", "capacity": 12, "notes": None, "done": False}
+    assert first["submitted_at"].startswith("2021-03-01")
+    assert first["Form_title"] == "Tracking"
+    # a question shown only for another answer is left out, as in the form
+    assert "site" not in first["answers"] and second["answers"]["site"] == "Esbjerg"
+
+def test_errors_name_the_rule_and_the_row(sheet):
+    df = pd.DataFrame([
+        {"project_id": "1", "phase": "Pilot"},
+        {"project_id": "9", "phase": "Demo", "capacity": "-1"},
+        {"project_id": "", "phase": "Full scale"},
+    ])
+    result = validate_import(df, sheet, "WS1", known_projects=("1",))
+
+    assert errors_of(result) == [
+        (3, "project_id"), (3, "phase"), (3, "capacity"),
+        (4, "project_id"), (4, "site"),
+    ]
+    assert result.invalid == 2
+    assert len(result.rows) == 1
+
+def test_required_if_may_point_at_a_later_question(sheet):
+    df = pd.DataFrame([
+        {"project_id": "1", "phase": "Pilot", "done": "yes"},
+        {"project_id": "1", "phase": "Pilot", "done": "yes", "notes": "Finished"},
+    ])
+    result = validate_import(df, sheet, "WS1")
+    assert errors_of(result) == [(2, "notes")]
+
+def test_columns_may_be_headed_by_label(sheet):
+    df = pd.DataFrame([{"project_id": "1", "Phase": "Pilot", "Unrelated": "x"}])
+    result = validate_import(df, sheet, "WS1")
+    assert result.errors.empty
+    assert result.rows[0]["answers"]["phase"] == "Pilot"
+    assert result.ignored_columns == ["Unrelated"]
+
+def test_same_file_gives_same_submission_ids(sheet):
+    df = pd.DataFrame([{"project_id": "1", "phase": "Pilot"}])
+    ids = [validate_import(df, sheet, "WS1", source_digest="abc").rows[0]["submission_id"] for _ in range(2)]
+    assert ids[0] == ids[1]
+    assert validate_import(df, sheet, "WS1", source_digest="other").rows[0]["submission_id"] != ids[0]
+
+
+def test_csv_blank_lines_are_skipped_and_rows_keep_their_numbers(sheet):
+    data = b"project_id,phase\n1,Pilot\n\n,\n1,Demo\n\n\n"
+    df = read_import_file(data, "entries.csv")
+    result = validate_import(df, sheet, "WS1")
+
+    assert result.total == 2
+    assert errors_of(result) == [(5, "phase")]
+
+def test_excel_blank_rows_are_skipped_and_rows_keep_their_numbers(sheet):
+    wb = Workbook()
+    ws = wb.active
+    for row in (["project_id", "phase"], ["1", "Pilot"], [None, None], ["1", "Demo"], [" ", ""]):
+        ws.append(row)
+    out = io.BytesIO()
+    wb.save(out)
+    result = validate_import(read_import_file(out.getvalue(), "entries.xlsx"), sheet, "WS1")
+
+    assert result.total == 2
+    assert errors_of(result) == [(4, "phase")]
@@ -0,0 +1,43 @@
+from datetime import date
+
+from drafts import DraftStore, decode, encode
+
+
+def test_drafts_round_trip_without_empty_answers():
+    store = DraftStore()
+    store.put((1, "p1"), {"a": "text", "b": "", "c": [], "d": None, "e": ["x"], "f": date(2025, 1, 2), "g": 0})
+    assert store.get((1, "p1")) == {"a": "text", "e": ["x"], "f": "2025-01-02", "g": 0}
+    assert store.get((1, "p2")) == {}
+
+def test_draft_without_answers_is_dropped():
+    store = DraftStore()
+    store.put((1, "p1"), {"a": "text"})
+    store.put((1, "p1"), {"a": " "})
+    assert len(store) == 0
+    assert encode({"a": None}) is None
+
+def test_least_recently_opened_draft_is_evicted():
+    store = DraftStore(max_drafts=2)
+    store.put((1, "p1"), {"a": "1"})
+    store.put((1, "p2"), {"a": "2"})
+    # opening p1 makes p2 the oldest
+    store.get((1, "p1"))
+    store.put((2, "p3"), {"a": "3"})
+
+    assert len(store) == 2
+    assert store.get((1, "p2")) == {}
+    assert store.get((1, "p1")) == {"a": "1"}
+    assert store.get((2, "p3")) == {"a": "3"}
+
+def test_discard_after_save():
+    store = DraftStore()
+    store.put((1, "p1"), {"a": "1"})
+    store.discard((1, "p1"))
+    store.discard((1, "p1"))
+    assert store.get((1, "p1")) == {}
+
+def test_drafts_are_stored_compressed():
+    answers = {f"q{i}": "carbon capture " * 20 for i in range(20)}
+    blob = encode(answers)
+    assert decode(blob) == answers
+    assert len(blob) < len(repr(answers)) / 10
@@ -0,0 +1,138 @@
+import sqlite3
+import time
+
+import pytest
+
+from outbox import Outbox, OutboxWorker
+
+
+class FakeQuery:
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table_name = table_name
+
+    def upsert(self, rows, **kwargs):
+        self.rows = rows
+        self.kwargs = kwargs
+        return self
+
+    def execute(self):
+        self.client.calls.append((self.table_name, self.client.token, [r["submission_id"] for r in self.rows]))
+        if any(r["submission_id"] in self.client.failing for r in self.rows):
+            raise RuntimeError("rejected")
+        self.client.sent.extend(self.rows)
+
+
+class FakeClient:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+        self.sent = []
+        self.token = None
+        self.postgrest = self
+
+    def auth(self, token):
+        self.token = token
+
+    def table(self, table_name):
+        return FakeQuery(self, table_name)
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(tmp_path / "outbox.sqlite3", base_delay=60)
+
+def tokens(box):
+    with sqlite3.connect(box.path) as con:
+        return dict(con.execute("SELECT submission_id, token FROM outbox"))
+
+
+def test_flush_sends_once_per_table_and_token(outbox):
+    a = outbox.enqueue("Tracking_WS1", {"project_id": "1", "submitted_at": "2020-01-01"}, "u1", "tok1")
+    b = outbox.enqueue("Tracking_WS1", {"project_id": "2"}, "u1", "tok1")
+    c = outbox.enqueue("Tracking_WS1", {"project_id": "3"}, "u2", "tok2")
+    client = FakeClient()
+
+    assert outbox.flush(client) == 3
+    assert [(t, tok, ids) for t, tok, ids in client.calls] == [
+        ("Tracking_WS1", "tok1", [a, b]),
+        ("Tracking_WS1", "tok2", [c]),
+    ]
+    assert outbox.pending() == 0
+    assert tokens(outbox) == {}
+    # sent as queued
+    assert client.sent[0]["submitted_at"] == "2020-01-01"
+
+def test_enqueue_is_idempotent_per_submission_id(outbox):
+    outbox.enqueue("Tracking_WS1", {"submission_id": "s1"}, "u1", "tok")
+    outbox.enqueue("Tracking_WS1", {"submission_id": "s1"}, "u1", "tok")
+    assert outbox.pending() == 1
+
+def test_claim_leases_rows(tmp_path):
+    box = Outbox(tmp_path / "outbox.sqlite3", lease=0.2)
+    box.enqueue("Tracking_WS1", {}, "u1", "tok")
+    assert len(box.claim(10)) == 1
+    # leased to the first claimer
+    assert box.claim(10) == []
+    time.sleep(0.25)
+    assert len(box.claim(10)) == 1
+
+def test_failed_row_backs_off_and_does_not_hold_back_the_batch(outbox):
+    good = outbox.enqueue("Tracking_WS1", {}, "u1", "tok")
+    bad = outbox.enqueue("Tracking_WS1", {}, "u1", "tok")
+    client = FakeClient(failing={bad})
+
+    assert outbox.flush(client) == 1
+    assert [r["submission_id"] for r in client.sent] == [good]
+    assert outbox.pending() == 1
+    # waits for its backoff before the next attempt
+    assert outbox.claim(10) == []
+    assert 30 <= outbox.next_due_in() <= 60
+
+def test_row_fails_after_max_attempts_and_drops_its_token(tmp_path):
+    box = Outbox(tmp_path / "outbox.sqlite3", base_delay=0, max_attempts=2)
+    sid = box.enqueue("Tracking_WS1", {}, "u1", "tok")
+    client = FakeClient(failing={sid})
+
+    box.flush(client)
+    assert box.pending() == 1
+    box.flush(client)
+    assert box.pending() == 0
+    assert [f["submission_id"] for f in box.failed()] == [sid]
+    assert box.failed()[0]["attempts"] == 2
+    assert tokens(box) == {sid: ""}
+
+def test_expired_token_waits_for_a_fresh_one(outbox):
+    sid = outbox.enqueue("Tracking_WS1", {}, "u1", "old", expires_at=time.time() - 1)
+    assert outbox.claim(10) == []
+    assert outbox.next_due_in() is None
+
+    outbox.update_token("u1", "new", time.time() + 3600)
+    client = FakeClient()
+    assert outbox.flush(client) == 1
+    assert client.calls == [("Tracking_WS1", "new", [sid])]
+
+def test_expired_token_gives_up_after_token_wait(tmp_path):
+    box = Outbox(tmp_path / "outbox.sqlite3", token_wait=0)
+    sid = box.enqueue("Tracking_WS1", {}, "u1", "old", expires_at=time.time() - 1)
+    box.enqueue("Tracking_WS1", {}, "u2", "valid", expires_at=time.time() + 3600)
+
+    assert box.flush(FakeClient()) == 1
+    assert [f["submission_id"] for f in box.failed()] == [sid]
+    assert tokens(box) == {sid: ""}
+
+
+def test_worker_sends_and_shuts_down(outbox):
+    client = FakeClient()
+    worker = OutboxWorker(outbox, client, interval=30)
+    worker.start()
+    outbox.enqueue("Tracking_WS1", {}, "u1", "tok")
+    worker.notify()
+    deadline = time.time() + 5
+    while outbox.pending() and time.time() < deadline:
+        time.sleep(0.01)
+    assert outbox.pending() == 0
+
+    worker.stop()
+    worker.join(timeout=5)
+    assert not worker.is_alive()
@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import shared_cache
+from shared_cache import SharedCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedCache(tmp_path / "shared.sqlite3")
+
+
+def test_entries_are_versioned(cache):
+    cache.set("k", {"a": 1}, version="v1")
+    assert cache.get("k", version="v1") == {"a": 1}
+    assert cache.get("k", version="v2") is None
+    assert cache.get("other", default="none") == "none"
+    m = cache.metrics()
+    assert (m["hits"], m["misses"], m["entries"]) == (1, 2, 1)
+
+def test_entries_expire(cache):
+    cache.set("k", 1, ttl=0.05)
+    assert cache.get("k") == 1
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+def test_least_recently_read_entries_are_evicted(tmp_path):
+    cache = SharedCache(tmp_path / "shared.sqlite3", max_bytes=250, touch_interval=0)
+    cache.set("a", b"x" * 100, dumps=bytes)
+    time.sleep(0.01)
+    cache.set("b", b"x" * 100, dumps=bytes)
+    time.sleep(0.01)
+    # reading "a" makes "b" the least recently used
+    assert cache.get("a", loads=bytes) is not None
+    time.sleep(0.01)
+    cache.set("c", b"x" * 100, dumps=bytes)
+
+    assert cache.get("b", loads=bytes) is None
+    assert cache.get("a", loads=bytes) is not None
+    assert cache.get("c", loads=bytes) is not None
+    assert cache.metrics()["bytes"] <= 250
+
+def test_values_larger_than_the_cache_are_not_stored(tmp_path):
+    cache = SharedCache(tmp_path / "shared.sqlite3", max_bytes=10)
+    cache.set("k", b"x" * 100, dumps=bytes)
+    assert cache.metrics()["entries"] == 0
+
+def test_get_or_compute_computes_once_across_instances(tmp_path):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    results = []
+    # one instance per thread, as separate processes would have
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            SharedCache(tmp_path / "shared.sqlite3").get_or_compute("k", compute, version="v")))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["value"] * 4
+    assert len(calls) == 1
+
+def test_get_or_compute_stops_waiting_for_a_held_lease(cache):
+    assert cache._acquire("k", "someone-else")
+    start = time.monotonic()
+    assert cache.get_or_compute("k", lambda: "mine", wait=0.2) == "mine"
+    assert time.monotonic() - start < 2
+    # the lease holder stores the value; without the lease nothing is stored
+    assert cache.get("k") is None
+
+def test_expired_lease_is_taken_over(tmp_path):
+    cache = SharedCache(tmp_path / "shared.sqlite3", lease=0.05)
+    assert cache._acquire("k", "crashed")
+    time.sleep(0.1)
+    assert cache.get_or_compute("k", lambda: "value") == "value"
+    assert cache.get("k") == "value"
+
+def test_bump_invalidates_generation_versions(cache):
+    assert cache.generation("projects:*", "projects:u1") == (0, 0)
+    cache.set("projects:user:u1", ["p1"], version=repr(cache.generation("projects:*", "projects:u1")))
+
+    assert cache.bump("projects:u1") == 1
+    generation = cache.generation("projects:*", "projects:u1")
+    assert generation == (0, 1)
+    assert cache.get("projects:user:u1", version=repr(generation)) is None
+
+def test_other_format_is_cleared(tmp_path, monkeypatch):
+    path = tmp_path / "shared.sqlite3"
+    SharedCache(path).set("k", 1)
+    monkeypatch.setattr(shared_cache, "FORMAT", shared_cache.FORMAT + 1)
+    cache = SharedCache(path)
+    assert cache.get("k") is None
+    with sqlite3.connect(path) as con:
+        assert con.execute("PRAGMA user_version").fetchone()[0] == shared_cache.FORMAT
@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+import pytest
+
+from tracking_cache import TrackingCache
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.keys = []
+        self.window = None
+
+    def select(self, *columns):
+        return self
+
+    def _filter(self, test, column, value):
+        self.filters.append(lambda r: r.get(column) is not None and test(r[column], value))
+        return self
+
+    def gt(self, column, value): return self._filter(lambda a, b: a > b, column, value)
+    def gte(self, column, value): return self._filter(lambda a, b: a >= b, column, value)
+    def lt(self, column, value): return self._filter(lambda a, b: a < b, column, value)
+
+    def order(self, column):
+        self.keys.append(column)
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end + 1)
+        return self
+
+    def limit(self, size):
+        self.window = (0, size)
+        return self
+
+    def execute(self):
+        rows = [r for r in self.rows if all(f(r) for f in self.filters)]
+        rows.sort(key=lambda r: tuple(r[k] for k in self.keys))
+        if self.window:
+            rows = rows[slice(*self.window)]
+        return SimpleNamespace(data=[dict(r) for r in rows])
+
+
+class FakeClient:
+    def __init__(self):
+        self.rows = []
+
+    def add(self, project_id, submitted_at):
+        self.rows.append({"id": len(self.rows) + 1, "project_id": project_id, "submitted_at": submitted_at,
+                          "user_id": "u1", "answers": {}})
+
+    def table(self, name):
+        return FakeQuery(self.rows)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TrackingCache(tmp_path / "tracking.sqlite3", page_size=2)
+
+
+def test_sync_fetches_only_new_rows(cache):
+    client = FakeClient()
+    for day in range(1, 6):
+        client.add("p1", f"2026-01-0{day}T12:00:00")
+    assert cache.sync(client, 1) == 5
+    client.add("p2", "2026-01-06T12:00:00")
+    assert cache.sync(client, 1) == 1
+    assert cache.sync(client, 1) == 0
+    assert cache.version(1) == (6, "2026-01-06T12:00:00")
+    assert cache.state(1)["last_id"] == 6
+
+def test_sync_picks_up_rows_delivered_late(cache):
+    client = FakeClient()
+    client.add("p1", "2026-01-10T12:00:00")
+    cache.sync(client, 1)
+    # queued offline days ago, inserted only now
+    client.add("p2", "2026-01-02T12:00:00")
+    assert cache.sync(client, 1) == 1
+    assert set(cache.project_status(1)["project_id"]) == {"p1", "p2"}
+
+def test_full_resync_replaces_the_cached_rows(cache):
+    client = FakeClient()
+    client.add("p1", "2026-01-01T12:00:00")
+    client.add("p1", "2026-01-02T12:00:00")
+    cache.sync(client, 1)
+    del client.rows[0]
+    assert cache.full_resync(client, 1) == 1
+    status = cache.project_status(1)
+    assert status["entries"].tolist() == [1]
+    assert cache.state(1)["last_id"] == 2
+
+def test_failed_full_resync_keeps_the_old_copy(cache):
+    client = FakeClient()
+    for day in range(1, 6):
+        client.add("p1", f"2026-01-0{day}T12:00:00")
+    cache.sync(client, 1)
+
+    class Failing(FakeClient):
+        def table(self, name):
+            query = super().table(name)
+            self.pages = getattr(self, "pages", 0) + 1
+            if self.pages > 1:
+                raise ConnectionError("lost")
+            return query
+
+    failing = Failing()
+    failing.rows = client.rows
+    with pytest.raises(ConnectionError):
+        cache.full_resync(failing, 1)
+    assert cache.version(1) == (5, "2026-01-05T12:00:00")
+    assert cache.project_status(1)["entries"].tolist() == [5]
+    # the temporary table went with the connection
+    assert cache.full_resync(client, 1) == 5
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from questionnaire import _compile_sheet
+from tracking_data import apply_answer_dtypes
+
+
+@pytest.fixture
+def sheet():
+    return _compile_sheet("WS1", pd.DataFrame([
+        {"question_id": "phase", "label": "Phase", "input_type": "selectbox", "options": "Pilot|Full scale|Pilot"},
+        {"question_id": "done", "label": "Done", "input_type": "checkbox"},
+    ]), {})
+
+
+def test_repeated_options_become_one_category(sheet):
+    df = apply_answer_dtypes(pd.DataFrame({"phase": ["Pilot", "Demo", None, "Demo"]}), sheet)
+    assert list(df["phase"].cat.categories) == ["Pilot", "Full scale", "Demo"]
+    assert df["phase"].tolist()[:2] == ["Pilot", "Demo"]
+    assert df["phase"].isna().tolist() == [False, False, True, False]
+
+def test_checkbox_words_are_read_as_in_bulk_import(sheet):
+    df = apply_answer_dtypes(pd.DataFrame({"done": [True, False, "Ja", " no ", "x", "maybe", None]}), sheet)
+    assert str(df["done"].dtype) == "boolean"
+    assert df["done"].tolist() == [True, False, True, False, True, pd.NA, pd.NA]
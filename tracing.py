@@ -0,0 +1,273 @@
+"""Timing spans per script run, for the admin diagnostics panel.
+
+Off unless ``TRACING=1``. Then ``span`` returns one shared no-op context
+manager, ``traced`` leaves functions undecorated and ``traced_client``
+returns the client itself, so the cost is an attribute lookup per call site.
+
+When on, every script run, fragment rerun and deferred download of a
+session gets a ``Trace``; spans from any thread that inherits the run's
+context (see ``tracking_data.run_concurrently``) are added to it. The last
+finished traces are kept per session and, with ``TRACE_LOG_PATH``, appended
+to a JSON-lines file.
+"""
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+
+ENABLED = os.getenv("TRACING", "").lower() in ("1", "true", "yes")
+LOG_PATH = os.getenv("TRACE_LOG_PATH", "")
+# Finished traces kept per session, and sessions kept, for the diagnostics panel
+HISTORY = int(os.getenv("TRACE_HISTORY", "20"))
+MAX_SESSIONS = int(os.getenv("TRACE_MAX_SESSIONS", "100"))
+
+_NOOP = nullcontext()
+_current = contextvars.ContextVar("trace", default=None)
+_log_lock = threading.Lock()
+
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    start_ms: float
+    duration_ms: float
+    attrs: dict
+
+
+@dataclass
+class Trace:
+    session_id: str
+    run: int
+    kind: str
+    started: float
+    t0: float = field(default_factory=time.perf_counter)
+    spans: list = field(default_factory=list)
+    duration_ms: float | None = None
+    status: str = "running"
+
+    @property
+    def round_trips(self) -> int:
+        return sum(1 for s in self.spans if s.category in ("supabase", "auth"))
+
+    def summary(self) -> list:
+        """``[{category, name, count, total_ms}]``, slowest first."""
+        agg = {}
+        for s in self.spans:
+            a = agg.setdefault((s.category, s.name), {"category": s.category, "name": s.name, "count": 0, "total_ms": 0.0})
+            a["count"] += 1
+            a["total_ms"] += s.duration_ms
+        return sorted(agg.values(), key=lambda a: -a["total_ms"])
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "run": self.run,
+            "kind": self.kind,
+            "started": self.started,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "round_trips": self.round_trips,
+            "spans": [s.__dict__ for s in self.spans],
+        }
+
+
+class _Span:
+    __slots__ = ("trace", "name", "category", "attrs", "start")
+
+    def __init__(self, trace: Trace, name: str, category: str, attrs: dict):
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        # list.append is atomic, so spans from worker threads need no lock
+        self.trace.spans.append(Span(
+            self.name, self.category,
+            (self.start - self.trace.t0) * 1000, (end - self.start) * 1000, self.attrs,
+        ))
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def current() -> Trace | None:
+    trace = _current.get()
+    return trace if trace is not None and trace.duration_ms is None else None
+
+def span(name: str, category: str = "app", **attrs):
+    if not ENABLED:
+        return _NOOP
+    trace = current()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name, category, attrs)
+
+def traced(name: str, category: str = "app"):
+    """Decorator form of ``span``; a no-op when tracing is off."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# =========================
+# Runs
+# =========================
+_runs = itertools.count(1)
+_open = {}                 # session id -> its script run, until ``end``
+_history = OrderedDict()   # session id -> deque of finished traces
+_lock = threading.Lock()
+
+def begin(session_id: str, kind: str = "run") -> Trace | None:
+    """Start the trace of a script run.
+
+    Called at the top of the script, which has no bottom it always reaches
+    (st.stop, st.rerun): a run of the session still open from before is
+    closed first, as "interrupted".
+    """
+    if not ENABLED:
+        return None
+    with _lock:
+        previous = _open.pop(session_id, None)
+    if previous is not None and previous.duration_ms is None:
+        end("interrupted", previous)
+    trace = Trace(session_id, next(_runs), kind, time.time())
+    with _lock:
+        _open[session_id] = trace
+    _current.set(trace)
+    return trace
+
+def end(status: str = "ok", trace: Trace | None = None):
+    trace = trace or current()
+    if trace is None:
+        return
+    if status == "interrupted":
+        # closed on the next run: the last span end is the best estimate
+        trace.duration_ms = max((s.start_ms + s.duration_ms for s in trace.spans), default=0.0)
+    else:
+        trace.duration_ms = (time.perf_counter() - trace.t0) * 1000
+    trace.status = status
+    with _lock:
+        if _open.get(trace.session_id) is trace:
+            del _open[trace.session_id]
+        history = _history.pop(trace.session_id, None) or deque(maxlen=HISTORY)
+        history.append(trace)
+        _history[trace.session_id] = history
+        while len(_history) > MAX_SESSIONS:
+            _history.popitem(last=False)
+    if LOG_PATH:
+        with _log_lock, open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(trace.to_dict(), default=str) + "\n")
+
+def history(session_id: str) -> list:
+    """The session's finished traces, oldest first."""
+    with _lock:
+        return list(_history.get(session_id, ()))
+
+
+class _Run:
+    def __init__(self, session_id: str, kind: str):
+        self.trace = Trace(session_id, next(_runs), kind, time.time())
+
+    def __enter__(self):
+        self.token = _current.set(self.trace)
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb):
+        end("ok" if exc_type is None else exc_type.__name__, self.trace)
+        _current.reset(self.token)
+        return False
+
+
+def run(session_id: str, kind: str):
+    """A trace of its own for work outside the script run: fragment reruns
+    and deferred downloads. Inside a traced run it adds nothing."""
+    if not ENABLED or current() is not None:
+        return _NOOP
+    return _Run(session_id, kind)
+
+# =========================
+# Supabase client
+# =========================
+QUERY_OPS = ("select", "insert", "upsert", "update", "delete")
+
+
+class _TracedQuery:
+    def __init__(self, query, name: str):
+        self._query = query
+        self._name = name
+
+    def __getattr__(self, attr):
+        value = getattr(self._query, attr)
+        if attr == "execute":
+            def execute(*args, **kwargs):
+                with span(self._name, "supabase") as s:
+                    res = value(*args, **kwargs)
+                    if s is not None:
+                        s.set(rows=len(getattr(res, "data", None) or []))
+                    return res
+            return execute
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            out = value(*args, **kwargs)
+            if not hasattr(out, "execute"):
+                return out
+            name = f"{self._name.split('.')[0]}.{attr}" if attr in QUERY_OPS else self._name
+            return _TracedQuery(out, name)
+        return call
+
+
+class _TracedAuth:
+    def __init__(self, auth):
+        self._auth = auth
+
+    def __getattr__(self, attr):
+        value = getattr(self._auth, attr)
+        if not callable(value) or attr.startswith("_"):
+            return value
+
+        def call(*args, **kwargs):
+            with span(f"auth.{attr}", "auth"):
+                return value(*args, **kwargs)
+        return call
+
+
+class _TracedClient:
+    def __init__(self, client):
+        self._client = client
+        self.auth = _TracedAuth(client.auth)
+
+    def table(self, table_name: str):
+        return _TracedQuery(self._client.table(table_name), table_name)
+
+    def __getattr__(self, attr):
+        return getattr(self._client, attr)
+
+
+def traced_client(client):
+    """Wrap a supabase (or local) client so every ``execute()`` and auth call
+    becomes a span. Returns ``client`` itself when tracing is off."""
+    return _TracedClient(client) if ENABLED else client
@@ -0,0 +1,339 @@
+"""Local SQLite copy of the Tracking_WS{n} tables.
+
+Tracking rows are insert-only, so after the first load only rows submitted
+since the last sync (the high-water mark) are fetched and merged. The look-
+back window ``overlap`` re-reads recent rows so entries whose submitted_at is
+slightly older than the mark (clock skew, delayed inserts) are still picked
+up; duplicates are ignored by primary key. Rows inserted later with an
+older submitted_at still (e.g. queued in the outbox while offline) are found
+by id instead: each sync also asks for rows above the largest id seen so far
+that fall before the window. Deleted or edited rows upstream are only picked
+up by ``full_resync``.
+
+Alongside the rows, ``project_status`` keeps one row per (workstream,
+project): the number of entries and the latest one. It is updated with each
+batch of new rows, so the status overview reads O(projects) rows instead of
+every entry. Which required questions the latest entry leaves unanswered
+depends on the questionnaire; that is filled in on read and recomputed only
+for entries that are new or were checked against another questionnaire.
+"""
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+
+from questionnaire import SheetSchema, resolve_form
+from tracking_data import PAGE_SIZE, iter_tracking_pages_after, iter_tracking_pages_since, parse_tracking_data
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracking_rows (
+    workstream   INTEGER NOT NULL,
+    id           TEXT    NOT NULL,
+    submitted_at TEXT,
+    record       TEXT    NOT NULL,
+    PRIMARY KEY (workstream, id)
+);
+CREATE INDEX IF NOT EXISTS tracking_rows_submitted
+    ON tracking_rows (workstream, submitted_at);
+CREATE TABLE IF NOT EXISTS sync_state (
+    workstream   INTEGER PRIMARY KEY,
+    submitted_at TEXT,
+    synced_at    REAL NOT NULL,
+    last_id      INTEGER
+);
+CREATE TABLE IF NOT EXISTS project_status (
+    workstream   INTEGER NOT NULL,
+    project_id   TEXT    NOT NULL,
+    entries      INTEGER NOT NULL,
+    latest_id    TEXT    NOT NULL,
+    submitted_at TEXT,
+    user_id      TEXT,
+    missing      TEXT,   -- JSON list of labels; NULL until checked
+    fingerprint  TEXT,   -- questionnaire the missing list was checked against
+    PRIMARY KEY (workstream, project_id)
+);
+"""
+
+# newest entry wins; ties on submitted_at go to the larger id, as in iter_rows.
+# Every SET sees the row as it was before the update, so each repeats the
+# same comparison
+UPSERT_STATUS = """
+INSERT INTO project_status (workstream, project_id, entries, latest_id, submitted_at, user_id)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (workstream, project_id) DO UPDATE SET
+    entries = entries + excluded.entries,
+    latest_id = CASE
+        WHEN (COALESCE(excluded.submitted_at, ''), excluded.latest_id) > (COALESCE(submitted_at, ''), latest_id)
+        THEN excluded.latest_id ELSE latest_id END,
+    user_id = CASE
+        WHEN (COALESCE(excluded.submitted_at, ''), excluded.latest_id) > (COALESCE(submitted_at, ''), latest_id)
+        THEN excluded.user_id ELSE user_id END,
+    missing = CASE
+        WHEN (COALESCE(excluded.submitted_at, ''), excluded.latest_id) > (COALESCE(submitted_at, ''), latest_id)
+        THEN NULL ELSE missing END,
+    submitted_at = CASE
+        WHEN (COALESCE(excluded.submitted_at, ''), excluded.latest_id) > (COALESCE(submitted_at, ''), latest_id)
+        THEN excluded.submitted_at ELSE submitted_at END
+"""
+
+REBUILD_STATUS = """
+INSERT INTO project_status (workstream, project_id, entries, latest_id, submitted_at, user_id)
+SELECT workstream, project_id, entries, id, submitted_at, user_id FROM (
+    SELECT workstream, project_id, id, submitted_at, user_id,
+           COUNT(*) OVER (PARTITION BY project_id) AS entries,
+           ROW_NUMBER() OVER (PARTITION BY project_id ORDER BY submitted_at DESC, id DESC) AS n
+    FROM (
+        SELECT workstream, id, submitted_at,
+               CAST(json_extract(record, '$.project_id') AS TEXT) AS project_id,
+               CAST(json_extract(record, '$.user_id') AS TEXT) AS user_id
+        FROM tracking_rows WHERE workstream = ?
+    )
+    WHERE project_id IS NOT NULL
+)
+WHERE n = 1
+"""
+
+
+def _since(high_water: str | None, overlap: timedelta) -> str | None:
+    if not high_water:
+        return None
+    try:
+        return (datetime.fromisoformat(high_water) - overlap).isoformat()
+    except ValueError:
+        return high_water
+
+def _row_id(row: dict) -> str:
+    rid = row.get("id")
+    return str(rid) if rid is not None else json.dumps(row, sort_keys=True, default=str)
+
+def _numeric_id(row: dict) -> int | None:
+    try:
+        return int(row.get("id"))
+    except (TypeError, ValueError):
+        return None
+
+def _max_id(rows: list, last_id: int | None) -> int | None:
+    """The largest numeric id among ``rows`` and ``last_id``."""
+    ids = [i for i in map(_numeric_id, rows) if i is not None]
+    if last_id is not None:
+        ids.append(last_id)
+    return max(ids, default=None)
+
+def _status_updates(workstream_num: int, rows: list) -> list:
+    """UPSERT_STATUS parameters for newly stored rows: per project, their
+    count and the newest of them."""
+    latest = {}
+    counts = {}
+    for r in rows:
+        pid = r.get("project_id")
+        if pid is None:
+            continue
+        pid = str(pid)
+        counts[pid] = counts.get(pid, 0) + 1
+        key = (r.get("submitted_at") or "", _row_id(r))
+        if pid not in latest or key > latest[pid][0]:
+            latest[pid] = (key, r)
+    return [
+        (workstream_num, pid, counts[pid], key[1], r.get("submitted_at"),
+         None if r.get("user_id") is None else str(r["user_id"]))
+        for pid, (key, r) in latest.items()
+    ]
+
+def _missing(record: str, sheet: SheetSchema) -> list:
+    answers = json.loads(record).get("answers")
+    if isinstance(answers, str):
+        try:
+            answers = json.loads(answers)
+        except ValueError:
+            answers = None
+    answers = answers if isinstance(answers, dict) else {}
+    return resolve_form(sheet, lambda q: answers.get(q.question_id)).missing
+
+
+class TrackingCache:
+    def __init__(self, path: Path, page_size: int = PAGE_SIZE, overlap: timedelta = timedelta(hours=24)):
+        self.path = Path(path)
+        self.page_size = page_size
+        self.overlap = overlap
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._db() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(SCHEMA)
+            # caches from before sync_state.last_id existed
+            if "last_id" not in {r[1] for r in con.execute("PRAGMA table_info(sync_state)")}:
+                con.execute("ALTER TABLE sync_state ADD COLUMN last_id INTEGER")
+            # caches from before project_status existed
+            stale = con.execute(
+                """SELECT DISTINCT workstream FROM tracking_rows
+                   WHERE workstream NOT IN (SELECT DISTINCT workstream FROM project_status)"""
+            ).fetchall()
+            for (ws,) in stale:
+                con.execute(REBUILD_STATUS, (ws,))
+
+    @contextmanager
+    def _db(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def state(self, workstream_num: int) -> dict | None:
+        with self._db() as con:
+            row = con.execute(
+                "SELECT submitted_at, synced_at, last_id FROM sync_state WHERE workstream = ?",
+                (workstream_num,),
+            ).fetchone()
+        return {"submitted_at": row[0], "synced_at": row[1], "last_id": row[2]} if row else None
+
+    def sync(self, client, workstream_num: int, min_interval: float = 0) -> int:
+        """Fetch rows newer than the high-water mark; returns the number added.
+
+        Skipped entirely if the last sync is less than ``min_interval``
+        seconds old.
+        """
+        state = self.state(workstream_num)
+        if state and min_interval and time.time() - state["synced_at"] < min_interval:
+            return 0
+        since = _since(state["submitted_at"] if state else None, self.overlap)
+        last_id = state["last_id"] if state else None
+        pages = [iter_tracking_pages_since(client, workstream_num, since, self.page_size)]
+        if since and last_id is not None:
+            pages.append(iter_tracking_pages_after(client, workstream_num, last_id, since, self.page_size))
+        added = 0
+        for rows in (rows for it in pages for rows in it):
+            last_id = _max_id(rows, last_id)
+            with self._db() as con:
+                added += len(self._insert_new(con, workstream_num, rows))
+        with self._db() as con:
+            con.execute(
+                """INSERT INTO sync_state (workstream, submitted_at, synced_at, last_id)
+                   VALUES (?, (SELECT MAX(submitted_at) FROM tracking_rows WHERE workstream = ?), ?, ?)
+                   ON CONFLICT (workstream) DO UPDATE
+                   SET submitted_at = excluded.submitted_at, synced_at = excluded.synced_at,
+                       last_id = excluded.last_id""",
+                (workstream_num, workstream_num, time.time(), last_id),
+            )
+        return added
+
+    def _insert_new(self, con, workstream_num: int, rows: list) -> list:
+        """Store the rows not cached yet and update their projects' status."""
+        by_id = {_row_id(r): r for r in rows}
+        known = set()
+        ids = list(by_id)
+        # in chunks, below SQLite's limit on bound parameters
+        for i in range(0, len(ids), 900):
+            chunk = ids[i:i + 900]
+            known.update(r[0] for r in con.execute(
+                f"SELECT id FROM tracking_rows WHERE workstream = ? AND id IN ({','.join('?' * len(chunk))})",
+                (workstream_num, *chunk),
+            ))
+        new = [r for rid, r in by_id.items() if rid not in known]
+        con.executemany(
+            "INSERT INTO tracking_rows (workstream, id, submitted_at, record) VALUES (?, ?, ?, ?)",
+            [(workstream_num, _row_id(r), r.get("submitted_at"), json.dumps(r, default=str)) for r in new],
+        )
+        con.executemany(UPSERT_STATUS, _status_updates(workstream_num, new))
+        return new
+
+    def full_resync(self, client, workstream_num: int) -> int:
+        # Pages are streamed into a temporary table and swapped in at the end,
+        # in one transaction, so a failed download keeps the old copy
+        last_id = None
+        with self._db() as con:
+            con.execute("CREATE TEMP TABLE resync (id TEXT PRIMARY KEY, submitted_at TEXT, record TEXT NOT NULL)")
+            for rows in iter_tracking_pages_since(client, workstream_num, None, self.page_size):
+                last_id = _max_id(rows, last_id)
+                con.executemany(
+                    "INSERT OR IGNORE INTO resync (id, submitted_at, record) VALUES (?, ?, ?)",
+                    [(_row_id(r), r.get("submitted_at"), json.dumps(r, default=str)) for r in rows],
+                )
+            con.execute("DELETE FROM tracking_rows WHERE workstream = ?", (workstream_num,))
+            con.execute("DELETE FROM sync_state WHERE workstream = ?", (workstream_num,))
+            con.execute("DELETE FROM project_status WHERE workstream = ?", (workstream_num,))
+            con.execute(
+                """INSERT INTO tracking_rows (workstream, id, submitted_at, record)
+                   SELECT ?, id, submitted_at, record FROM resync""",
+                (workstream_num,),
+            )
+            con.execute(REBUILD_STATUS, (workstream_num,))
+            con.execute(
+                """INSERT INTO sync_state (workstream, submitted_at, synced_at, last_id)
+                   VALUES (?, (SELECT MAX(submitted_at) FROM tracking_rows WHERE workstream = ?), ?, ?)""",
+                (workstream_num, workstream_num, time.time(), last_id),
+            )
+            return con.execute("SELECT COUNT(*) FROM resync").fetchone()[0]
+
+    def version(self, workstream_num: int) -> tuple:
+        """``(row_count, max submitted_at)``; changes whenever rows are added."""
+        with self._db() as con:
+            count, latest = con.execute(
+                "SELECT COUNT(*), MAX(submitted_at) FROM tracking_rows WHERE workstream = ?",
+                (workstream_num,),
+            ).fetchone()
+        return count, latest
+
+    def answer_keys(self, workstream_num: int) -> list:
+        """Every answer key present in the cached rows of a workstream."""
+        with self._db() as con:
+            rows = con.execute(
+                """SELECT DISTINCT a.key
+                   FROM tracking_rows t, json_each(json_extract(t.record, '$.answers')) a
+                   WHERE t.workstream = ? AND json_valid(json_extract(t.record, '$.answers'))""",
+                (workstream_num,),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def iter_rows(self, workstream_num: int, chunk_size: int = PAGE_SIZE) -> Iterator[list]:
+        """Cached rows newest-first, ``chunk_size`` at a time."""
+        with self._db() as con:
+            cur = con.execute(
+                "SELECT record FROM tracking_rows WHERE workstream = ? ORDER BY submitted_at DESC, id DESC",
+                (workstream_num,),
+            )
+            while True:
+                batch = cur.fetchmany(chunk_size)
+                if not batch:
+                    return
+                yield [json.loads(r[0]) for r in batch]
+
+    def iter_frames(self, workstream_num: int, chunk_size: int = PAGE_SIZE, sheet: SheetSchema | None = None) -> Iterator[pd.DataFrame]:
+        ws_label = f"WS{workstream_num}"
+        for rows in self.iter_rows(workstream_num, chunk_size):
+            yield parse_tracking_data(rows, ws_label, sheet)
+
+    def project_status(self, workstream_num: int, sheet: SheetSchema | None = None, fingerprint: str = "") -> pd.DataFrame:
+        """One row per project with entries in the workstream: ``project_id``,
+        ``entries``, ``submitted_at`` and ``user_id`` of the latest entry, and
+        with ``sheet`` the labels of the required questions it leaves
+        unanswered (``missing``).
+
+        ``fingerprint`` identifies the questionnaire version; entries checked
+        against another version are checked again.
+        """
+        with self._db() as con:
+            if sheet is not None:
+                stale = con.execute(
+                    """SELECT s.project_id, t.record FROM project_status s
+                       JOIN tracking_rows t ON t.workstream = s.workstream AND t.id = s.latest_id
+                       WHERE s.workstream = ? AND (s.missing IS NULL OR s.fingerprint IS NOT ?)""",
+                    (workstream_num, fingerprint),
+                ).fetchall()
+                con.executemany(
+                    "UPDATE project_status SET missing = ?, fingerprint = ? WHERE workstream = ? AND project_id = ?",
+                    [(json.dumps(_missing(record, sheet)), fingerprint, workstream_num, pid) for pid, record in stale],
+                )
+            rows = con.execute(
+                """SELECT project_id, entries, submitted_at, user_id, missing FROM project_status
+                   WHERE workstream = ? ORDER BY submitted_at DESC""",
+                (workstream_num,),
+            ).fetchall()
+        df = pd.DataFrame(rows, columns=["project_id", "entries", "submitted_at", "user_id", "missing"])
+        df["missing"] = [json.loads(m) if sheet is not None and m else [] for m in df["missing"]]
+        return df
@@ -0,0 +1,169 @@
+"""Reading the Tracking_WS{n} tables.
+
+The helpers here take the Supabase client as an argument and never touch
+Streamlit, so they can run on worker threads.
+"""
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Iterator
+
+import pandas as pd
+
+import tracing
+from questionnaire import FALSE_WORDS, TRUE_WORDS, SheetSchema, split_multiselect
+
+# Must not exceed the PostgREST max-rows setting (1000 on Supabase by default),
+# otherwise a capped page is mistaken for the last one
+PAGE_SIZE = 1000
+BASE_FIELDS = ['idx', 'id', 'project_id', 'submitted_at', 'user_id', 'Form_title', 'Workstream']
+# what the cache and exports read; other columns are never downloaded
+TRACKING_COLUMNS = ",".join([*BASE_FIELDS, "answers"])
+
+
+def tracking_table(workstream_num: int) -> str:
+    return f"Tracking_WS{workstream_num}"
+
+def _decode_answers(answers: pd.Series) -> list:
+    """Decode the answers column to a list of dicts.
+
+    Rows stored as JSON strings are decoded with one ``json.loads`` call over
+    all of them; only if that fails is each string decoded separately.
+    """
+    values = answers.tolist()
+    str_pos = [i for i, a in enumerate(values) if isinstance(a, str)]
+    if str_pos:
+        try:
+            decoded = json.loads("[" + ",".join(values[i] for i in str_pos) + "]")
+        except json.JSONDecodeError:
+            decoded = []
+            for i in str_pos:
+                try:
+                    decoded.append(json.loads(values[i]))
+                except json.JSONDecodeError:
+                    decoded.append({})
+        for i, a in zip(str_pos, decoded):
+            values[i] = a
+    return [a if isinstance(a, dict) else {} for a in values]
+
+def apply_answer_dtypes(df: pd.DataFrame, sheet: SheetSchema) -> pd.DataFrame:
+    """Give answer columns the dtype implied by the question's input_type."""
+    for q in sheet.questions:
+        qid = q.question_id
+        if qid not in df.columns:
+            continue
+        col = df[qid]
+        itype = q.input_type.lower()
+        if itype in ("number", "number_float"):
+            num = pd.to_numeric(col, errors="coerce")
+            if itype == "number" and (num.dropna() % 1 == 0).all():
+                num = num.astype("Int64")
+            df[qid] = num
+        elif itype == "date":
+            df[qid] = pd.to_datetime(col, errors="coerce", format="ISO8601")
+        elif itype in ("selectbox", "radio"):
+            col = col.where(col.isna(), col.astype(str))
+            extra = [v for v in col.dropna().unique() if v not in q.options]
+            df[qid] = pd.Categorical(col, categories=list(dict.fromkeys([*q.options, *extra])))
+        elif itype == "multiselect":
+            df[qid] = col.map(lambda v: split_multiselect(v, q.options))
+        elif itype == "checkbox":
+            # as bulk_import reads them; anything else is unknown, not an error
+            words = col.astype(str).str.strip().str.lower()
+            checked = words.isin(TRUE_WORDS)
+            df[qid] = checked.astype("boolean").where(checked | words.isin(FALSE_WORDS))
+    return df
+
+@tracing.traced("parse", "parse")
+def parse_tracking_data(raw_data: list, workstream: str, sheet: SheetSchema | None = None) -> pd.DataFrame:
+    """Flatten tracking rows to one column per answer.
+
+    With ``sheet`` the answer columns are typed from the questionnaire (see
+    ``apply_answer_dtypes``).
+    """
+    if not raw_data:
+        return pd.DataFrame()
+
+    records = pd.DataFrame.from_records(raw_data)
+    defaults = {"Form_title": "", "Workstream": workstream}
+    base = pd.DataFrame(
+        {c: records[c] if c in records.columns else defaults.get(c) for c in BASE_FIELDS},
+        index=records.index,
+    )
+    for c, default in defaults.items():
+        base[c] = base[c].fillna(default)
+    if "answers" in records.columns:
+        answers = pd.DataFrame.from_records(_decode_answers(records["answers"]), index=records.index)
+    else:
+        answers = pd.DataFrame(index=records.index)
+
+    # an answer with the same name as a base field wins, as it always has
+    base = base.drop(columns=[c for c in answers.columns if c in base.columns])
+    df = pd.concat([base, answers], axis=1)
+    if sheet is not None:
+        df = apply_answer_dtypes(df, sheet)
+    return df
+
+def iter_tracking_pages_since(client, workstream_num: int, since: str | None = None, page_size: int = PAGE_SIZE) -> Iterator[list]:
+    """Yield rows with submitted_at >= ``since`` oldest-first.
+
+    Ascending offsets stay valid while new rows are appended, which is what
+    an incremental sync needs.
+    """
+    table = tracking_table(workstream_num)
+    start = 0
+    while True:
+        query = client.table(table).select(TRACKING_COLUMNS)
+        if since:
+            query = query.gte("submitted_at", since)
+        resp = query.order("submitted_at").order("id").range(start, start + page_size - 1).execute()
+        rows = resp.data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        start += page_size
+
+def iter_tracking_pages_after(client, workstream_num: int, after_id: int, before: str, page_size: int = PAGE_SIZE) -> Iterator[list]:
+    """Yield rows with id > ``after_id`` but submitted_at < ``before``, by id.
+
+    These are rows inserted after the last sync that carry an older
+    timestamp, e.g. submissions the outbox delivered late, which a sync by
+    submitted_at alone would never see.
+    """
+    table = tracking_table(workstream_num)
+    while True:
+        resp = (
+            client.table(table).select(TRACKING_COLUMNS)
+            .gt("id", after_id).lt("submitted_at", before)
+            .order("id").limit(page_size).execute()
+        )
+        rows = resp.data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        after_id = rows[-1]["id"]
+
+def run_concurrently(tasks: dict, max_workers: int = 10, timeout: float | None = 30) -> dict:
+    """Run ``{key: callable}`` on a thread pool.
+
+    Returns ``{key: result}``; a task that raised maps to its exception and a
+    task still running after ``timeout`` seconds maps to a ``TimeoutError``.
+    """
+    if not tasks:
+        return {}
+    results = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks))))
+    try:
+        # each task runs in a copy of the caller's context, so its spans join the caller's trace
+        futures = {pool.submit(contextvars.copy_context().run, fn): key for key, fn in tasks.items()}
+        done, not_done = wait(futures, timeout=timeout)
+        for f in done:
+            results[futures[f]] = f.exception() or f.result()
+        for f in not_done:
+            f.cancel()
+            results[futures[f]] = TimeoutError(f"{futures[f]} did not finish within {timeout}s")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results